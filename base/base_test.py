@@ -5,9 +5,14 @@
 
 import requests
 import json
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Union
+from urllib.parse import quote
 import allure
 
+from base.live_metrics import LiveMetrics
+from base.metrics import RequestStats
+
 
 class BaseTest:
     """
@@ -27,13 +32,40 @@ class BaseTest:
     # Таймаут для HTTP-запросов в секундах
     TIMEOUT = 10
 
-    def __init__(self):
+    # Общий сборщик live-метрик для всех экземпляров (включается в conftest.py)
+    live_metrics: Optional[LiveMetrics] = None
+
+    # Методы с @allure.step, которые при reporting=False вызываются без обертки
+    _STEP_METHODS = ("_make_request", "create_user", "get_user", "update_user", "delete_user",
+                     "login", "logout", "log_response", "validate_json_schema")
+
+    def __init__(self, base_url: Optional[str] = None, stats: Optional[RequestStats] = None,
+                 reporting: bool = True):
         """
         Инициализация тестового класса.
 
         Создает HTTP-сессию с предустановленными заголовками.
         Сессия повторно использует TCP-соединения для повышения производительности.
+
+        Аргументы:
+            base_url: URL API вместо BASE_URL (например, локальный стенд для нагрузки)
+            stats: Объект RequestStats для записи латентности и ошибок запросов
+            reporting: Если False, запросы и ответы не прикрепляются к Allure, а шаги
+                @allure.step не создаются (режим нагрузки, где отчетность - основная
+                клиентская нагрузка)
         """
+        if base_url:
+            self.BASE_URL = base_url.rstrip("/")
+        self.stats = stats
+        self.reporting = reporting
+        # Ключ запроса, который сейчас "в полете" (читается воркером нагрузки без блокировок)
+        self.current_request: Optional[str] = None
+
+        if not reporting:
+            # Исходные функции без обертки шага привязываются к экземпляру
+            for name in self._STEP_METHODS:
+                setattr(self, name, getattr(type(self), name).__wrapped__.__get__(self))
+
         # Создание сессии requests
         self.session = requests.Session()
 
@@ -48,10 +80,11 @@ class BaseTest:
             self,
             method: str,
             endpoint: str,
-            data: Optional[Dict] = None,
+            data: Optional[Union[Dict, bytes]] = None,
             params: Optional[Dict] = None,
             expected_status: int = 200,
-            allow_failure: bool = False
+            allow_failure: bool = False,
+            name: Optional[str] = None
     ) -> requests.Response:
         """
         Универсальный метод для выполнения HTTP-запросов к реальному API.
@@ -59,10 +92,13 @@ class BaseTest:
         Аргументы:
             method: HTTP-метод (POST, GET, PUT, DELETE и т.д.)
             endpoint: End-point API (например, /user/login)
-            data: Тело запроса в формате JSON (для POST/PUT)
+            data: Тело запроса в формате JSON (для POST/PUT) или готовые JSON-байты
+                (например, из PayloadCorpus), которые отправляются без сериализации
             params: Query-параметры (для GET)
             expected_status: Ожидаемый HTTP-статус код (по умолчанию 200)
             allow_failure: Если True, не выбрасывает исключение при ошибке
+            name: Шаблон эндпоинта для метрик (например, /user/{username});
+                по умолчанию используется endpoint
 
         Возвращает:
             Объект Response из библиотеки requests
@@ -73,37 +109,59 @@ class BaseTest:
         # Формируем полный URL
         url = f"{self.BASE_URL}{endpoint}"
 
+        # Готовое JSON-тело отправляется как есть, словарь сериализует requests
+        raw_body = isinstance(data, (bytes, bytearray))
+
         # Логирование запроса в Allure-отчет
-        allure.attach(
-            f"URL: {url}\nMethod: {method}\nData: {json.dumps(data, indent=2) if data else 'None'}\nParams: "
-            f"{json.dumps(params, indent=2) if params else 'None'}",
-            name="Запрос",
-            attachment_type=allure.attachment_type.JSON
-        )
+        if self.reporting:
+            body = data.decode("utf-8", "replace") if raw_body else json.dumps(data, indent=2)
+            allure.attach(
+                f"URL: {url}\nMethod: {method}\nData: {body if data else 'None'}\nParams: "
+                f"{json.dumps(params, indent=2) if params else 'None'}",
+                name="Запрос",
+                attachment_type=allure.attachment_type.JSON
+            )
+
+        # Ключ эндпоинта для метрик
+        key = f"{method.upper()} {name or endpoint}"
+        if self.live_metrics is not None:
+            self.live_metrics.request_started(key)
+        self.current_request = key
+        started = time.perf_counter()
 
         try:
-            # Выполнение HTTP-запроса через сессию
-            response = self.session.request(
-                method=method.upper(),  # Преобразуем метод в верхний регистр
-                url=url,
-                json=data,  # Автоматическая сериализация в JSON
-                params=params,
-                timeout=self.TIMEOUT  # Таймаут из константы класса
-            )
+            try:
+                # Выполнение HTTP-запроса через сессию
+                response = self.session.request(
+                    method=method.upper(),  # Преобразуем метод в верхний регистр
+                    url=url,
+                    json=None if raw_body else data,  # Автоматическая сериализация в JSON
+                    data=data if raw_body else None,
+                    params=params,
+                    timeout=self.TIMEOUT  # Таймаут из константы класса
+                )
+            except BaseException:
+                # Ошибка транспорта (таймаут, обрыв соединения) - тоже учитывается в метриках
+                self._record_metrics(key, started, ok=False)
+                raise
+
+            # Запись латентности и статуса в метрики
+            self._record_metrics(key, started, ok=response.status_code < 400)
 
             # Если не разрешены ошибки, выбрасываем исключение при 4xx/5xx статусах
             if not allow_failure:
                 response.raise_for_status()
 
             # Логирование ответа в Allure-отчет
-            allure.attach(
-                f"Status: {response.status_code}\nBody: {response.text}",
-                name="Ответ",
-                attachment_type=allure.attachment_type.JSON
-            )
+            if self.reporting:
+                allure.attach(
+                    f"Status: {response.status_code}\nBody: {response.text}",
+                    name="Ответ",
+                    attachment_type=allure.attachment_type.JSON
+                )
 
             # Проверка соответствия фактического и ожидаемого статуса
-            if response.status_code != expected_status:
+            if response.status_code != expected_status and self.reporting:
                 print(f"[!] Ожидаемый статус: {expected_status}, Получен: {response.status_code}")
                 allure.attach(
                     f"Ожидаемый статус: {expected_status}, Получен: {response.status_code}",
@@ -115,15 +173,16 @@ class BaseTest:
 
         except requests.exceptions.RequestException as e:
             # Обработка ошибок запроса
-            error_msg = f"[ERROR] Ошибка запроса: {method} {url}\nДетали: {str(e)}"
-            print(error_msg)
+            if self.reporting:
+                error_msg = f"[ERROR] Ошибка запроса: {method} {url}\nДетали: {str(e)}"
+                print(error_msg)
 
-            # Логирование ошибки в Allure
-            allure.attach(
-                error_msg,
-                name="Ошибка запроса",
-                attachment_type=allure.attachment_type.TEXT
-            )
+                # Логирование ошибки в Allure
+                allure.attach(
+                    error_msg,
+                    name="Ошибка запроса",
+                    attachment_type=allure.attachment_type.TEXT
+                )
 
             # Если ошибки не разрешены - выбрасываем исключение
             if not allow_failure:
@@ -136,20 +195,34 @@ class BaseTest:
                 dummy_response._content = b'{"error": "Not Found"}'
                 return dummy_response
 
+    def _record_metrics(self, key: str, started: float, ok: bool):
+        """Запись длительности и результата запроса в статистику и live-метрики"""
+        self.current_request = None
+        live = self.live_metrics
+        if self.stats is None and live is None:
+            return
+        elapsed = time.perf_counter() - started
+        if self.stats is not None:
+            self.stats.record(key, elapsed, ok)
+        if live is not None:
+            live.request_finished(key, elapsed, ok)
+
     # --- Методы для работы с API PetStore ---
 
     @allure.step("Создание пользователя")
-    def create_user(self, user_data: Dict[str, Any]) -> requests.Response:
+    def create_user(self, user_data: Union[Dict[str, Any], bytes], allow_failure: bool = False) -> requests.Response:
         """
         Создание нового пользователя через POST /user
 
         Аргументы:
             user_data: Словарь с данными пользователя (username, email, password и т.д.)
+                или готовое JSON-тело в байтах
+            allow_failure: Если True, не выбрасывает исключение при ошибке (для невалидных данных)
 
         Возвращает:
             Response объект с результатом создания
         """
-        return self._make_request("POST", "/user", data=user_data, expected_status=200)
+        return self._make_request("POST", "/user", data=user_data, expected_status=200, allow_failure=allow_failure)
 
     @allure.step("Получение пользователя {username}")
     def get_user(self, username: str) -> requests.Response:
@@ -159,7 +232,7 @@ class BaseTest:
         Аргументы:
             username: Имя пользователя для получения
         """
-        return self._make_request("GET", f"/user/{username}", expected_status=200)
+        return self._make_request("GET", f"/user/{_path_segment(username)}", expected_status=200, name="/user/{username}")
 
     @allure.step("Обновление пользователя {username}")
     def update_user(self, username: str, user_data: Dict[str, Any]) -> requests.Response:
@@ -170,7 +243,8 @@ class BaseTest:
             username: Имя пользователя для обновления
             user_data: Новые данные пользователя
         """
-        return self._make_request("PUT", f"/user/{username}", data=user_data, expected_status=200)
+        return self._make_request("PUT", f"/user/{_path_segment(username)}", data=user_data, expected_status=200,
+                                  name="/user/{username}")
 
     @allure.step("Удаление пользователя {username}")
     def delete_user(self, username: str, allow_failure: bool = False) -> requests.Response:
@@ -181,7 +255,8 @@ class BaseTest:
             username: Име пользователя для удаления
             allow_failure: Если True, не выбрасывает исключение при ошибке (например, 404)
         """
-        return self._make_request("DELETE", f"/user/{username}", expected_status=200, allow_failure=allow_failure)
+        return self._make_request("DELETE", f"/user/{_path_segment(username)}", expected_status=200, allow_failure=allow_failure,
+                                  name="/user/{username}")
 
     @allure.step("Авторизация пользователя {username}")
     def login(self, username: str, password: str) -> requests.Response:
@@ -273,4 +348,9 @@ class BaseTest:
         except Exception as e:
             # Обработка неожиданных ошибок при валидации
             allure.attach(f"Ошибка валидации: {e}", name="Исключение", attachment_type=allure.attachment_type.TEXT)
-            return False
\ No newline at end of file
+            return False
+
+
+def _path_segment(value: str) -> str:
+    """Значение для подстановки в путь: "/", "?", "#" и пр. не меняют адрес запроса"""
+    return quote(str(value), safe="")
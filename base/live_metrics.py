@@ -0,0 +1,279 @@
+# base/live_metrics.py
+# Live-метрики во время прогона: RPS, запросы "в полете", доля ошибок
+# и скользящие p50/p99 по эндпоинтам
+#
+# Метрики отдаются в формате Prometheus по HTTP (/metrics) и периодически
+# выводятся сводкой в терминал. Запись одного запроса - несколько операций
+# со словарями под одной блокировкой (единицы микросекунд).
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional
+
+from base.metrics import LatencyHistogram, RequestStats
+
+
+class _EndpointWindow:
+    """
+    Скользящее окно метрик одного эндпоинта.
+
+    Окно - кольцо посекундных слотов: каждый слот хранит гистограмму,
+    количество запросов и ошибок за свою секунду. Устаревший слот
+    обнуляется при первой записи в новую секунду.
+    """
+
+    __slots__ = ("seconds", "histograms", "requests", "errors",
+                 "in_flight", "total_requests", "total_errors", "total_us")
+
+    def __init__(self, window: int):
+        self.seconds = [-1] * window
+        self.histograms = [LatencyHistogram() for _ in range(window)]
+        self.requests = [0] * window
+        self.errors = [0] * window
+        self.in_flight = 0
+        self.total_requests = 0
+        self.total_errors = 0
+        self.total_us = 0
+
+    def _slot(self, second: int) -> int:
+        index = second % len(self.seconds)
+        if self.seconds[index] != second:
+            self.seconds[index] = second
+            self.histograms[index] = LatencyHistogram()
+            self.requests[index] = 0
+            self.errors[index] = 0
+        return index
+
+    def record(self, second: int, value_us: int, ok: bool):
+        index = self._slot(second)
+        self.histograms[index].record(value_us)
+        self.requests[index] += 1
+        self.total_requests += 1
+        self.total_us += value_us
+        if not ok:
+            self.errors[index] += 1
+            self.total_errors += 1
+
+    def ingest(self, second: int, requests: int, errors: int, histogram: LatencyHistogram):
+        index = self._slot(second)
+        self.histograms[index].merge(histogram)
+        self.requests[index] += requests
+        self.errors[index] += errors
+        self.total_requests += requests
+        self.total_errors += errors
+        self.total_us += histogram.total
+
+    def snapshot(self, now: int, span: float) -> Dict[str, Any]:
+        """Агрегат по слотам окна, не старше len(seconds) секунд"""
+        window = len(self.seconds)
+        merged = LatencyHistogram()
+        requests = errors = 0
+        for index, second in enumerate(self.seconds):
+            if now - window < second <= now:
+                merged.merge(self.histograms[index])
+                requests += self.requests[index]
+                errors += self.errors[index]
+        return {
+            "rps": requests / span,
+            "error_rate": errors / requests if requests else 0.0,
+            "p50": merged.percentile(50) / 1_000_000,
+            "p99": merged.percentile(99) / 1_000_000,
+            "in_flight": self.in_flight,
+            "requests_total": self.total_requests,
+            "errors_total": self.total_errors,
+            "latency_sum": self.total_us / 1_000_000,
+        }
+
+
+class LiveMetrics:
+    """
+    Потокобезопасный сборщик live-метрик запросов.
+
+    Используется из BaseTest._make_request (через BaseTest.live_metrics)
+    или получает дельты RequestStats от координатора распределенной нагрузки.
+    """
+
+    # Префикс имен метрик Prometheus
+    PREFIX = "api_client"
+
+    def __init__(self, window: int = 30):
+        """
+        Аргументы:
+            window: Длина скользящего окна для RPS, ошибок и перцентилей, в секундах
+        """
+        self.window = window
+        self.started = time.monotonic()
+        self._endpoints: Dict[str, _EndpointWindow] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+
+    def _endpoint(self, key: str) -> _EndpointWindow:
+        endpoint = self._endpoints.get(key)
+        if endpoint is None:
+            endpoint = self._endpoints[key] = _EndpointWindow(self.window)
+        return endpoint
+
+    # --- Путь запроса ---
+
+    def request_started(self, key: str):
+        """Запрос ушел в сеть: увеличиваем счетчик запросов "в полете" """
+        with self._lock:
+            self._endpoint(key).in_flight += 1
+
+    def request_finished(self, key: str, elapsed: float, ok: bool):
+        """
+        Запрос завершен (успешно или с ошибкой).
+
+        Аргументы:
+            key: Ключ эндпоинта (например, "GET /user/{username}")
+            elapsed: Длительность запроса в секундах
+            ok: False для ошибок (исключение или статус 4xx/5xx)
+        """
+        second = int(time.monotonic())
+        with self._lock:
+            endpoint = self._endpoint(key)
+            endpoint.in_flight -= 1
+            endpoint.record(second, int(elapsed * 1_000_000), ok)
+
+    def ingest(self, stats: RequestStats, in_flight: Optional[Dict[str, int]] = None):
+        """
+        Учет дельты статистики, присланной воркером, в текущей секунде.
+
+        Аргументы:
+            stats: Дельта статистики запросов
+            in_flight: Запросы в полете по эндпоинтам, суммарно по всем воркерам;
+                заменяет текущие значения (эндпоинты без запросов - 0)
+        """
+        second = int(time.monotonic())
+        with self._lock:
+            for key, item in stats.endpoints.items():
+                self._endpoint(key).ingest(second, item.requests, item.errors, item.latency)
+            if in_flight is not None:
+                for key in in_flight:
+                    self._endpoint(key)
+                for key, endpoint in self._endpoints.items():
+                    endpoint.in_flight = in_flight.get(key, 0)
+
+    # --- Чтение ---
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Текущие значения метрик по эндпоинтам"""
+        now = time.monotonic()
+        # В начале прогона окно еще не заполнено - делим на фактическое время
+        span = max(1.0, min(float(self.window), now - self.started))
+        with self._lock:
+            return {key: endpoint.snapshot(int(now), span) for key, endpoint in self._endpoints.items()}
+
+    def render_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        snapshot = self.snapshot()
+        prefix = self.PREFIX
+        metrics = [
+            ("requests_total", "counter", "Всего запросов", "requests_total"),
+            ("errors_total", "counter", "Всего ошибок (исключения и статусы 4xx/5xx)", "errors_total"),
+            ("in_flight", "gauge", "Запросы в полете", "in_flight"),
+            ("rps", "gauge", f"Запросов в секунду за последние {self.window} с", "rps"),
+            ("error_rate", "gauge", f"Доля ошибок за последние {self.window} с", "error_rate"),
+        ]
+        lines: List[str] = []
+        for name, metric_type, help_text, field in metrics:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {metric_type}")
+            for key in sorted(snapshot):
+                lines.append(f"{prefix}_{name}{{{_labels(key)}}} {_value(snapshot[key][field])}")
+
+        lines.append(f"# HELP {prefix}_latency_seconds Латентность, квантили за последние {self.window} с")
+        lines.append(f"# TYPE {prefix}_latency_seconds summary")
+        for key in sorted(snapshot):
+            item = snapshot[key]
+            labels = _labels(key)
+            lines.append(f'{prefix}_latency_seconds{{{labels},quantile="0.5"}} {_value(item["p50"])}')
+            lines.append(f'{prefix}_latency_seconds{{{labels},quantile="0.99"}} {_value(item["p99"])}')
+            lines.append(f"{prefix}_latency_seconds_sum{{{labels}}} {_value(item['latency_sum'])}")
+            lines.append(f"{prefix}_latency_seconds_count{{{labels}}} {item['requests_total']}")
+        return "\n".join(lines) + "\n"
+
+    def render_summary(self) -> str:
+        """Сводка для вывода в терминал"""
+        snapshot = self.snapshot()
+        total_rps = sum(item["rps"] for item in snapshot.values())
+        in_flight = sum(item["in_flight"] for item in snapshot.values())
+        lines = [f"[live] {time.strftime('%H:%M:%S')}  RPS: {total_rps:.1f}  в полете: {in_flight}"]
+        for key in sorted(snapshot):
+            item = snapshot[key]
+            lines.append(
+                f"  {key:<28} rps={item['rps']:<8.1f} err={item['error_rate'] * 100:5.1f}%  "
+                f"p50={item['p50'] * 1000:.2f}ms p99={item['p99'] * 1000:.2f}ms  "
+                f"в полете={item['in_flight']}"
+            )
+        return "\n".join(lines)
+
+    # --- Фоновые потоки ---
+
+    def start_server(self, port: int, host: str = "127.0.0.1") -> int:
+        """
+        Запуск HTTP-эндпоинта /metrics в фоновом потоке.
+
+        Возвращает:
+            Фактический порт (при port=0 выбирается свободный)
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Не засоряем вывод тестов логами каждого опроса
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="live-metrics-http", daemon=True).start()
+        return self._server.server_address[1]
+
+    def start_reporter(self, interval: float, stream=None):
+        """Периодический вывод сводки в терминал (в обход перехвата вывода pytest)"""
+        stream = stream or sys.__stdout__
+
+        def report():
+            while not self._stop.wait(interval):
+                if self._endpoints:
+                    print("\n" + self.render_summary(), file=stream, flush=True)
+
+        threading.Thread(target=report, name="live-metrics-reporter", daemon=True).start()
+
+    def stop(self):
+        """Остановка HTTP-сервера и вывода сводки"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _value(value) -> str:
+    """
+    Значение метрики Prometheus без потери точности.
+
+    Счетчики и in_flight выводятся целыми, дробные метрики - через repr
+    (формат :g округляет до 6 знаков и ломает rate() на больших счетчиках).
+    """
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _labels(key: str) -> str:
+    """Метки Prometheus из ключа "МЕТОД /эндпоинт" """
+    method, _, endpoint = key.partition(" ")
+    endpoint = endpoint.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'method="{method}",endpoint="{endpoint}"'
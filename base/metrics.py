@@ -0,0 +1,218 @@
+# base/metrics.py
+# Сбор клиентских метрик запросов: латентность и счетчики по эндпоинтам
+# Гистограммы сливаются точно (суммирование корзин), без усреднения перцентилей
+
+import math
+from typing import Dict, Any, Optional, Tuple
+
+
+class LatencyHistogram:
+    """
+    Лог-линейная гистограмма латентности в микросекундах.
+
+    Значения меньше 2 * SUB_BUCKETS хранятся точно, остальные попадают
+    в корзины с относительной погрешностью не более 1 / SUB_BUCKETS (~1.6%).
+    Корзины фиксированы, поэтому две гистограммы сливаются простым
+    суммированием счетчиков: результат совпадает с гистограммой,
+    в которую все значения записали напрямую.
+    """
+
+    # 6 бит мантиссы -> 64 корзины на каждую степень двойки
+    SUB_BUCKET_BITS = 6
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}  # индекс корзины -> количество
+        self.count = 0
+        self.total = 0  # сумма значений в мкс (для среднего)
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    @classmethod
+    def bucket_index(cls, value: int) -> int:
+        """Индекс корзины для значения в микросекундах"""
+        if value < 2 * cls.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - (cls.SUB_BUCKET_BITS + 1)
+        return shift * cls.SUB_BUCKETS + (value >> shift)
+
+    @classmethod
+    def bucket_bounds(cls, index: int) -> Tuple[int, int]:
+        """Нижняя и верхняя граница корзины (включительно) в микросекундах"""
+        if index < 2 * cls.SUB_BUCKETS:
+            return index, index
+        shift = index // cls.SUB_BUCKETS - 1
+        mantissa = index - shift * cls.SUB_BUCKETS
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value_us: int):
+        """Запись одного значения латентности в микросекундах"""
+        if value_us < 0:
+            value_us = 0
+        index = self.bucket_index(value_us)
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value_us
+        if self.min is None or value_us < self.min:
+            self.min = value_us
+        if self.max is None or value_us > self.max:
+            self.max = value_us
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """Точное слияние другой гистограммы в текущую"""
+        counts = self.counts
+        for index, value in other.counts.items():
+            counts[index] = counts.get(index, 0) + value
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def percentile(self, q: float) -> int:
+        """
+        Значение перцентиля q (0-100) в микросекундах.
+
+        Возвращает верхнюю границу корзины, ограниченную фактическим максимумом.
+        """
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(self.count * q / 100.0))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.bucket_bounds(index)[1], self.max)
+        return self.max
+
+    def mean(self) -> float:
+        """Среднее значение в микросекундах"""
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Сериализация в JSON-совместимый словарь"""
+        return {
+            "counts": {str(index): value for index, value in sorted(self.counts.items())},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        """Восстановление гистограммы из словаря to_dict()"""
+        histogram = cls()
+        histogram.counts = {int(index): value for index, value in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+
+class EndpointStats:
+    """Счетчики и гистограмма латентности одного эндпоинта"""
+
+    __slots__ = ("requests", "errors", "latency")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+    def merge(self, other: "EndpointStats") -> "EndpointStats":
+        self.requests += other.requests
+        self.errors += other.errors
+        self.latency.merge(other.latency)
+        return self
+
+
+class RequestStats:
+    """
+    Статистика запросов, сгруппированная по ключу "МЕТОД /шаблон/эндпоинта".
+
+    Объект не потокобезопасен: каждый поток пишет в свой экземпляр,
+    а итог собирается через merge().
+    """
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = {}
+
+    def record(self, key: str, elapsed: float, ok: bool = True):
+        """
+        Запись результата одного запроса.
+
+        Аргументы:
+            key: Ключ эндпоинта (например, "GET /user/{username}")
+            elapsed: Длительность запроса в секундах
+            ok: False для ошибок (исключение или статус 4xx/5xx)
+        """
+        endpoint = self.endpoints.get(key)
+        if endpoint is None:
+            endpoint = self.endpoints[key] = EndpointStats()
+        endpoint.requests += 1
+        if not ok:
+            endpoint.errors += 1
+        endpoint.latency.record(int(elapsed * 1_000_000))
+
+    def merge(self, other: "RequestStats") -> "RequestStats":
+        """Точное слияние статистики другого потока/процесса"""
+        for key, stats in other.endpoints.items():
+            endpoint = self.endpoints.get(key)
+            if endpoint is None:
+                endpoint = self.endpoints[key] = EndpointStats()
+            endpoint.merge(stats)
+        return self
+
+    @property
+    def total_requests(self) -> int:
+        return sum(endpoint.requests for endpoint in self.endpoints.values())
+
+    @property
+    def total_errors(self) -> int:
+        return sum(endpoint.errors for endpoint in self.endpoints.values())
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Сводка по эндпоинтам: количество, ошибки и перцентили в миллисекундах"""
+        result = {}
+        for key in sorted(self.endpoints):
+            endpoint = self.endpoints[key]
+            latency = endpoint.latency
+            result[key] = {
+                "requests": endpoint.requests,
+                "errors": endpoint.errors,
+                "mean_ms": round(latency.mean() / 1000, 3),
+                "p50_ms": latency.percentile(50) / 1000,
+                "p90_ms": latency.percentile(90) / 1000,
+                "p99_ms": latency.percentile(99) / 1000,
+                "max_ms": (latency.max or 0) / 1000,
+            }
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Сериализация в JSON-совместимый словарь (с сырыми гистограммами)"""
+        return {
+            key: {
+                "requests": endpoint.requests,
+                "errors": endpoint.errors,
+                "latency": endpoint.latency.to_dict(),
+            }
+            for key, endpoint in self.endpoints.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RequestStats":
+        """Восстановление статистики из словаря to_dict()"""
+        stats = cls()
+        for key, item in data.items():
+            endpoint = stats.endpoints[key] = EndpointStats()
+            endpoint.requests = item["requests"]
+            endpoint.errors = item["errors"]
+            endpoint.latency = LatencyHistogram.from_dict(item["latency"])
+        return stats
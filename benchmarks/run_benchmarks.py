@@ -0,0 +1,380 @@
+# benchmarks/run_benchmarks.py
+# Микробенчмарки клиентских накладных расходов BaseTest и UserDataGenerator
+#
+# Все сетевые замеры идут к локальному стенду (benchmarks/stand_in.py) или
+# к адаптеру requests без сети, поэтому цифры отражают клиентскую сторону.
+# Результаты сохраняются в JSON для сравнения между коммитами.
+#
+# Запуск:
+#   python -m benchmarks.run_benchmarks                          # полный прогон
+#   python -m benchmarks.run_benchmarks --quick --only make_request
+#   python -m benchmarks.run_benchmarks --compare reports/benchmarks/<старый>.json
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+import allure_commons
+import requests
+from allure_commons.logger import AllureFileLogger
+from allure_commons.model2 import TestResult, TestStepResult
+from allure_commons.reporter import AllureReporter
+from allure_commons.utils import now
+from requests.adapters import HTTPAdapter
+
+from base.base_test import BaseTest
+from base.metrics import LatencyHistogram
+from benchmarks.stand_in import spawn_stand_in
+from generators.data_generator import UserDataGenerator
+from generators.payload_corpus import PayloadCorpus
+from load import scenarios
+
+# Каталог результатов по умолчанию
+RESULTS_DIR = os.path.join("reports", "benchmarks")
+
+# Уровни параллелизма для сквозного CRUD
+CONCURRENCY_LEVELS = [1, 4, 16]
+
+USER_SCHEMA = {
+    "id": int, "username": str, "firstName": str, "lastName": str,
+    "email": str, "password": str, "phone": str, "userStatus": int
+}
+
+STUB_URL = "http://stub/v2"
+STUB_BODY = json.dumps({
+    "id": 1001, "username": "bench_user", "firstName": "Bench", "lastName": "User",
+    "email": "bench@example.com", "password": "secret", "phone": "5550100", "userStatus": 1
+}).encode("utf-8")
+
+
+class _StubAdapter(HTTPAdapter):
+    """Адаптер requests без сети: сразу возвращает готовый ответ"""
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response._content = STUB_BODY
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+
+class _AllureSink:
+    """
+    Минимальный слушатель Allure для замеров с reporting=on.
+
+    Шаги и вложения проходят тот же путь, что и при pytest --alluredir:
+    AllureReporter и запись файлов вложений на диск (во временный каталог).
+    """
+
+    def __enter__(self) -> "_AllureSink":
+        self._dir = tempfile.TemporaryDirectory(prefix="allure-bench-")
+        self._reporter = AllureReporter()
+        self._logger = AllureFileLogger(self._dir.name)
+        self._test_uuid = str(uuid4())
+        self._reporter.schedule_test(self._test_uuid, TestResult(name="benchmark", uuid=self._test_uuid))
+        allure_commons.plugin_manager.register(self._logger)
+        allure_commons.plugin_manager.register(self)
+        return self
+
+    def __exit__(self, *exc):
+        allure_commons.plugin_manager.unregister(self)
+        allure_commons.plugin_manager.unregister(self._logger)
+        self._reporter.drop_test(self._test_uuid)
+        self._dir.cleanup()
+
+    @allure_commons.hookimpl
+    def start_step(self, uuid, title, params):
+        self._reporter.start_step(None, uuid, TestStepResult(name=title, start=now()))
+
+    @allure_commons.hookimpl
+    def stop_step(self, uuid, exc_type, exc_val, exc_tb):
+        self._reporter.stop_step(uuid, stop=now())
+
+    @allure_commons.hookimpl
+    def attach_data(self, body, name, attachment_type, extension):
+        self._reporter.attach_data(uuid4(), body, name=name, attachment_type=attachment_type, extension=extension)
+
+
+def _stub_base(reporting: bool) -> BaseTest:
+    base = BaseTest(base_url=STUB_URL, reporting=reporting)
+    base.session.mount("http://stub/", _StubAdapter())
+    return base
+
+
+def measure(func: Callable[[], Any], number: int, repeat: int = 5, per_call: int = 1) -> Dict[str, Any]:
+    """
+    Замер времени одного вызова.
+
+    Аргументы:
+        func: Замеряемая функция без аргументов
+        number: Вызовов в одном повторе
+        repeat: Количество повторов (в отчет идут min/median/mean по повторам)
+        per_call: Сколько операций выполняет один вызов func (для пакетных замеров)
+    """
+    for _ in range(min(number, 10)):
+        func()  # Прогрев: соединения, кэши, ленивые импорты
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / (number * per_call) * 1_000_000)
+
+    median = statistics.median(samples)
+    return {
+        "unit": "us/op",
+        "ops": number * per_call,
+        "repeat": repeat,
+        "min": round(min(samples), 3),
+        "median": round(median, 3),
+        "mean": round(statistics.fmean(samples), 3),
+        "ops_per_s": round(1_000_000 / median, 1) if median else None,
+    }
+
+
+def crud_throughput(base_url: str, concurrency: int, duration: float) -> Dict[str, Any]:
+    """
+    Сквозной CRUD (create/get/update/delete) в concurrency потоках, у каждого своя сессия.
+
+    Исключения замеряемых итераций считаются ошибками (в результате - errors);
+    ошибка прогрева прерывает замер и пробрасывается как RuntimeError.
+    """
+    histograms = [LatencyHistogram() for _ in range(concurrency)]
+    counts = [0] * concurrency
+    errors = [0] * concurrency
+    failures: List[BaseException] = []
+    # Все потоки прогревают соединение, затем стартуют одновременно
+    barrier = threading.Barrier(concurrency + 1)
+    go = threading.Event()
+    stop_at = [0.0]
+
+    def worker(index: int):
+        base = BaseTest(base_url=base_url, reporting=False)
+        generator = UserDataGenerator(seed=index)
+        try:
+            scenarios.crud_round_trip(base, generator)  # Прогрев соединения
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            return  # Прогрев упал в другом потоке
+        except Exception as error:
+            failures.append(error)
+            barrier.abort()  # Будим остальные потоки и главный поток
+            return
+        go.wait()
+        while time.perf_counter() < stop_at[0]:
+            started = time.perf_counter()
+            try:
+                scenarios.crud_round_trip(base, generator)
+            except Exception:
+                errors[index] += 1
+                continue
+            histograms[index].record(int((time.perf_counter() - started) * 1_000_000))
+            counts[index] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    try:
+        barrier.wait()
+    except threading.BrokenBarrierError:
+        for thread in threads:
+            thread.join()
+        raise RuntimeError(f"Прогрев CRUD не прошел: {failures[0]!r}") from failures[0]
+    started = time.perf_counter()
+    stop_at[0] = started + duration
+    go.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    merged = LatencyHistogram()
+    for histogram in histograms:
+        merged.merge(histogram)
+    round_trips = sum(counts)
+    return {
+        "unit": "round_trips/s",
+        "concurrency": concurrency,
+        "round_trips": round_trips,
+        "errors": sum(errors),
+        "elapsed_s": round(elapsed, 3),
+        "round_trips_per_s": round(round_trips / elapsed, 1),
+        "requests_per_s": round(round_trips * 4 / elapsed, 1),
+        "p50_ms": merged.percentile(50) / 1000,
+        "p99_ms": merged.percentile(99) / 1000,
+    }
+
+
+def collect_benchmarks(base_url: str, corpus: PayloadCorpus, scale: float, duration: float
+                       ) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Набор бенчмарков: имя -> функция замера"""
+    def n(count: int) -> int:
+        return max(10, int(count * scale))
+
+    stub_off, stub_on = _stub_base(reporting=False), _stub_base(reporting=True)
+    live_off = BaseTest(base_url=base_url, reporting=False)
+    live_on = BaseTest(base_url=base_url, reporting=True)
+    live_off.create_user(json.loads(STUB_BODY))
+    stub_url = f"{STUB_URL}/user/bench_user"
+    live_url = f"{base_url}/user/bench_user"
+    generator = UserDataGenerator(seed=1)
+    payload = json.loads(STUB_BODY)
+
+    def with_allure(func, number):
+        def run():
+            with _AllureSink():
+                return measure(func, number)
+        return run
+
+    benchmarks = {
+        # Накладные расходы _make_request относительно голого session.request
+        "session_request[stub]": lambda: measure(
+            lambda: stub_off.session.request("GET", stub_url, timeout=BaseTest.TIMEOUT), n(5000)),
+        "make_request[stub,reporting=off]": lambda: measure(lambda: stub_off.get_user("bench_user"), n(5000)),
+        "make_request[stub,reporting=on]": with_allure(lambda: stub_on.get_user("bench_user"), n(2000)),
+        "session_request[stand-in]": lambda: measure(
+            lambda: live_off.session.request("GET", live_url, timeout=BaseTest.TIMEOUT), n(1000)),
+        "make_request[stand-in,reporting=off]": lambda: measure(lambda: live_off.get_user("bench_user"), n(1000)),
+        "make_request[stand-in,reporting=on]": with_allure(lambda: live_on.get_user("bench_user"), n(1000)),
+
+        # Генерация данных: одиночная, пакетная, без Allure и из корпуса
+        "generate_single_user": lambda: measure(generator.generate_single_user, n(2000)),
+        "generate_bulk_users[100]": lambda: measure(lambda: generator.generate_bulk_users(100), n(20), per_call=100),
+        "build_user": lambda: measure(generator.build_user, n(2000)),
+        "corpus.sample_raw": lambda: measure(lambda: corpus.sample_raw(rnd=generator.random), n(100000)),
+        "corpus.sample": lambda: measure(lambda: corpus.sample(rnd=generator.random), n(50000)),
+
+        # Валидация схемы одного payload
+        "validate_json_schema": lambda: measure(lambda: live_off.validate_json_schema(payload, USER_SCHEMA), n(20000)),
+
+        # Одна сессия на все запросы против нового BaseTest (и TCP-соединения) на каждый тест
+        "session_reuse[shared BaseTest]": lambda: measure(lambda: live_off.get_user("bench_user"), n(1000)),
+        "session_reuse[new BaseTest per test]": lambda: measure(
+            lambda: BaseTest(base_url=base_url, reporting=False).get_user("bench_user"), n(500)),
+    }
+    for concurrency in CONCURRENCY_LEVELS:
+        benchmarks[f"crud_round_trip[concurrency={concurrency}]"] = (
+            lambda concurrency=concurrency: crud_throughput(base_url, concurrency, duration)
+        )
+    return benchmarks
+
+
+def _derived(results: Dict[str, Dict[str, Any]]) -> Dict[str, float]:
+    """Производные метрики: чистые накладные расходы _make_request в мкс на вызов"""
+    pairs = {
+        "make_request_overhead_us[stub,reporting=off]": ("make_request[stub,reporting=off]", "session_request[stub]"),
+        "make_request_overhead_us[stub,reporting=on]": ("make_request[stub,reporting=on]", "session_request[stub]"),
+        "make_request_overhead_us[stand-in,reporting=off]": (
+            "make_request[stand-in,reporting=off]", "session_request[stand-in]"),
+        "make_request_overhead_us[stand-in,reporting=on]": (
+            "make_request[stand-in,reporting=on]", "session_request[stand-in]"),
+    }
+    return {
+        name: round(results[full]["median"] - results[bare]["median"], 3)
+        for name, (full, bare) in pairs.items()
+        if full in results and bare in results
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _headline(result: Dict[str, Any]) -> str:
+    if result["unit"] == "us/op":
+        return f"{result['median']:>12.2f} мкс/оп  ({result['ops_per_s']} оп/с)"
+    return (f"{result['round_trips_per_s']:>12.1f} CRUD/с  ({result['requests_per_s']} запросов/с, "
+            f"p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms, ошибок: {result['errors']})")
+
+
+def _primary(result: Dict[str, Any]) -> float:
+    """Основное значение для сравнения (мкс/оп или CRUD/с)"""
+    return result["median"] if result["unit"] == "us/op" else result["round_trips_per_s"]
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """Вывод изменения относительно сохраненного прогона (+ - хуже, - лучше для мкс/оп)"""
+    print(f"\nСравнение с {baseline['meta'].get('commit')} ({baseline['meta'].get('date')}):")
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None or old["unit"] != result["unit"]:
+            continue
+        before, after = _primary(old), _primary(result)
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"  {name:<44} {before:>12.2f} -> {after:>12.2f} {result['unit']:<14} {change:+6.1f}%")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Бенчмарки клиентской части BaseTest и UserDataGenerator")
+    parser.add_argument("--quick", action="store_true", help="В 10 раз меньше итераций (быстрая проверка)")
+    parser.add_argument("--only", action="append", default=[], help="Запускать бенчмарки, содержащие подстроку")
+    parser.add_argument("--duration", type=float, default=5.0, help="Длительность каждого CRUD-замера, секунд")
+    parser.add_argument("--output", default=None, help="Файл результатов JSON")
+    parser.add_argument("--compare", default=None, help="JSON предыдущего прогона для сравнения")
+    args = parser.parse_args(argv)
+
+    scale = 0.1 if args.quick else 1.0
+    duration = args.duration * scale if args.quick else args.duration
+    stand_in, base_url = spawn_stand_in()
+    corpus = PayloadCorpus.load_or_build()
+    benchmarks = collect_benchmarks(base_url, corpus, scale, duration)
+    if args.only:
+        benchmarks = {name: func for name, func in benchmarks.items() if any(part in name for part in args.only)}
+
+    results = {}
+    try:
+        for name, func in benchmarks.items():
+            results[name] = func()
+            print(f"{name:<44} {_headline(results[name])}", flush=True)
+    finally:
+        stand_in.terminate()
+        corpus.close()
+
+    derived = _derived(results)
+    for name, value in derived.items():
+        print(f"{name:<52} {value:>10.2f} мкс")
+
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "results": results,
+        "derived": derived,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nРезультаты сохранены: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# benchmarks/stand_in.py
+# Локальный стенд API пользователей PetStore для бенчмарков и нагрузки
+#
+# Повторяет ответы /user эндпоинтов реального API, хранит пользователей в памяти.
+# Сделан на стандартной библиотеке, чтобы накладные расходы сервера были
+# минимальными и стабильными между коммитами.
+#
+# Запуск отдельно:
+#   python -m benchmarks.stand_in --port 8080
+#   python -m load.distributed run --base-url http://127.0.0.1:8080/v2 ...
+
+import argparse
+import json
+import multiprocessing
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.connection import Connection
+from typing import Dict, Any, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Префикс путей, как у реального API (BaseTest.BASE_URL оканчивается на /v2)
+PREFIX = "/v2"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Обработчик /user эндпоинтов с keep-alive"""
+
+    protocol_version = "HTTP/1.1"
+    # Без алгоритма Нейгла: заголовки и тело уходят отдельными записями
+    disable_nagle_algorithm = True
+
+    server: "StandInServer"
+
+    def _send(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _message(self, status: int, message: str, headers: Dict[str, str] = None):
+        self._send(status, {"code": status, "type": "unknown" if status == 200 else "error", "message": message},
+                   headers)
+
+    def _read_json(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def _route(self) -> Tuple[str, Dict[str, list]]:
+        parts = urlsplit(self.path)
+        path = parts.path[len(PREFIX):] if parts.path.startswith(PREFIX) else parts.path
+        # username в пути экранирован клиентом (BaseTest), "/" внутри него - %2F
+        return unquote(path), parse_qs(parts.query)
+
+    def do_GET(self):
+        path, query = self._route()
+        if path == "/user/login":
+            self._message(200, f"logged in user session:{int(time.time() * 1000)}", {
+                "X-Rate-Limit": "5000",
+                "X-Expires-After": time.strftime("%a %b %d %H:%M:%S UTC %Y", time.gmtime(time.time() + 3600)),
+            })
+        elif path == "/user/logout":
+            self._message(200, "ok")
+        elif path.startswith("/user/"):
+            user = self.server.users.get(path[len("/user/"):])
+            if user is None:
+                self._send(404, {"code": 1, "type": "error", "message": "User not found"})
+            else:
+                self._send(200, user)
+        else:
+            self._message(404, "not found")
+
+    def do_POST(self):
+        path, _ = self._route()
+        if path != "/user":
+            self._message(404, "not found")
+            return
+        try:
+            user = self._read_json()
+        except ValueError:
+            self._message(400, "bad input")
+            return
+        if not isinstance(user, dict):
+            self._message(400, "bad input")
+            return
+        with self.server.lock:
+            self.server.users[str(user.get("username", ""))] = user
+        self._message(200, str(user.get("id", 0)))
+
+    def do_PUT(self):
+        path, _ = self._route()
+        if not path.startswith("/user/"):
+            self._message(404, "not found")
+            return
+        try:
+            user = self._read_json()
+        except ValueError:
+            self._message(400, "bad input")
+            return
+        with self.server.lock:
+            self.server.users[path[len("/user/"):]] = user
+        self._message(200, str(user.get("id", 0)) if isinstance(user, dict) else "0")
+
+    def do_DELETE(self):
+        path, _ = self._route()
+        username = path[len("/user/"):] if path.startswith("/user/") else None
+        with self.server.lock:
+            found = username is not None and self.server.users.pop(username, None) is not None
+        if found:
+            self._message(200, username)
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass  # Логи каждого запроса искажают замеры
+
+
+class StandInServer(ThreadingHTTPServer):
+    """HTTP-сервер стенда с хранилищем пользователей в памяти"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """URL для BaseTest(base_url=...)"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{PREFIX}"
+
+
+def start_stand_in(host: str = "127.0.0.1", port: int = 0) -> StandInServer:
+    """
+    Запуск стенда в фоновом потоке.
+
+    Возвращает:
+        Сервер; URL для клиентов - server.base_url, остановка - server.shutdown()
+    """
+    server = StandInServer(host, port)
+    threading.Thread(target=server.serve_forever, name="stand-in", daemon=True).start()
+    return server
+
+
+def _serve(host: str, port: int, conn: Connection):
+    server = StandInServer(host, port)
+    conn.send(server.base_url)
+    conn.close()
+    server.serve_forever()
+
+
+def spawn_stand_in(host: str = "127.0.0.1", port: int = 0) -> Tuple[multiprocessing.Process, str]:
+    """
+    Запуск стенда в отдельном процессе, чтобы сервер не делил GIL с замеряемым клиентом.
+
+    Возвращает:
+        Процесс (остановка - process.terminate()) и URL для BaseTest(base_url=...)
+    """
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_serve, args=(host, port, child_conn), name="stand-in", daemon=True)
+    process.start()
+    child_conn.close()
+    return process, parent_conn.recv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный стенд API пользователей PetStore")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    server = StandInServer(args.host, args.port)
+    print(f"Стенд запущен: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
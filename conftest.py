@@ -1,37 +1,82 @@
+import random
+
 import pytest
-import requests
 import allure
 
+from base.base_test import BaseTest
+from base.live_metrics import LiveMetrics
+from benchmarks.stand_in import start_stand_in
+from generators.data_generator import derive_seed
+from generators.payload_corpus import PayloadCorpus
+
+
+def pytest_addoption(parser):
+    """Опции live-метрик во время прогона"""
+    group = parser.getgroup("live-metrics", "Live-метрики запросов")
+    group.addoption("--live-metrics-port", type=int, default=None,
+                    help="Порт HTTP-эндпоинта /metrics в формате Prometheus (по умолчанию выключен)")
+    group.addoption("--live-metrics-interval", type=float, default=0,
+                    help="Период вывода сводки метрик в терминал, секунд (0 - не выводить)")
+    group.addoption("--live-metrics-window", type=int, default=30,
+                    help="Скользящее окно для RPS, ошибок и перцентилей, секунд")
+
+    group = parser.getgroup("test-data", "Тестовые данные")
+    group.addoption("--data-seed", type=int, default=None,
+                    help="Базовый seed генерации данных (по умолчанию - случайный, выводится в начале)")
+
+
+def pytest_configure(config):
+    """Фиксация seed данных и включение live-метрик для всех экземпляров BaseTest"""
+    # Без явного seed выбираем случайный, но печатаем его для воспроизведения
+    if config.getoption("--data-seed") is None:
+        config.option.data_seed = random.SystemRandom().randrange(2 ** 32)
+    print(f"\n🎲 Seed данных: {config.option.data_seed} (повтор: --data-seed {config.option.data_seed})")
+
+    port = config.getoption("--live-metrics-port")
+    interval = config.getoption("--live-metrics-interval")
+    if port is None and not interval:
+        return
+
+    live = LiveMetrics(window=config.getoption("--live-metrics-window"))
+    if port is not None:
+        port = live.start_server(port)
+        print(f"\n📈 Live-метрики: http://127.0.0.1:{port}/metrics")
+    if interval:
+        live.start_reporter(interval)
+    BaseTest.live_metrics = live
+
+
+def pytest_unconfigure(config):
+    """Остановка live-метрик в конце сессии"""
+    if BaseTest.live_metrics is not None:
+        BaseTest.live_metrics.stop()
+        BaseTest.live_metrics = None
+
+
+@pytest.fixture
+def data_seed(request) -> int:
+    """Seed данных текущего теста: зависит от --data-seed и nodeid теста"""
+    seed = derive_seed(request.config.getoption("--data-seed"), request.node.nodeid)
+    allure.attach(
+        f"--data-seed {request.config.getoption('--data-seed')}\nseed теста: {seed}",
+        name="Seed данных",
+        attachment_type=allure.attachment_type.TEXT
+    )
+    return seed
+
+
+@pytest.fixture(scope="session")
+def payload_corpus():
+    """Корпус валидных и невалидных payload-ов (собирается один раз и кэшируется на диске)"""
+    corpus = PayloadCorpus.load_or_build()
+    yield corpus
+    corpus.close()
+
 
-@pytest.fixture(scope="session", autouse=True)
-def setup_test_environment():
-    """Настройка окружения перед тестами"""
-    with allure.step("Проверка доступности API"):
-        print("\n" + "=" * 50)
-        print("НАСТРОЙКА ОКРУЖЕНИЯ")
-        print("=" * 50)
-
-    try:
-        response = requests.get(
-            "https://petstore.swagger.io/v2/user/login",
-            params={"username": "test", "password": "test"},
-            timeout=5
-        )
-        print(f"✅ API доступен (статус: {response.status_code})")
-        allure.attach(
-            f"API доступен: {response.status_code}",
-            name="Инициализация",
-            attachment_type=allure.attachment_type.TEXT
-        )
-    except Exception as e:
-        error_msg = f"⚠️  API не доступен: {e}"
-        print(error_msg)
-        allure.attach(error_msg, name="Ошибка инициализации", attachment_type=allure.attachment_type.TEXT)
-        pytest.skip("API не доступен")
-
-    yield
-
-    with allure.step("Завершение тестов"):
-        print("\n" + "=" * 50)
-        print("ЗАВЕРШЕНИЕ ТЕСТОВ")
-        print("=" * 50)
\ No newline at end of file
+@pytest.fixture
+def stand_in():
+    """Локальный стенд API пользователей в фоновом потоке (тесты без реального PetStore)"""
+    server = start_stand_in()
+    yield server
+    server.shutdown()
+    server.server_close()
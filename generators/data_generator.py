@@ -1,30 +1,63 @@
 from faker import Faker
 import random
-from typing import Dict, Any, List
+import zlib
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
 import json
 import allure
 
+if TYPE_CHECKING:
+    from generators.payload_corpus import PayloadCorpus
+
+
+def derive_seed(seed: int, *parts: Any) -> int:
+    """
+    Производный seed для теста, воркера или потока.
+
+    Зависит только от базового seed и частей (например, nodeid теста
+    или номеров воркера и потока), поэтому одинаков между запусками.
+    """
+    key = ":".join(str(part) for part in (seed, *parts))
+    return zlib.crc32(key.encode("utf-8"))
+
 
 class UserDataGenerator:
     """Генератор тестовых данных для пользователей"""
 
-    def __init__(self, locale: str = "en_US"):
+    def __init__(self, locale: str = "en_US", seed: Optional[int] = None,
+                 corpus: Optional["PayloadCorpus"] = None):
+        """
+        Аргументы:
+            locale: Локаль Faker
+            seed: Seed для воспроизводимой генерации (None - случайные данные)
+            corpus: Готовый корпус payload-ов: невалидные данные берутся из него
+                без генерации (выборка детерминирована при заданном seed)
+        """
+        self.seed = seed
+        self.corpus = corpus
+        # Собственный генератор вместо глобального модуля random
+        self.random = random.Random(seed)
         self.fake = Faker(locale)
+        if seed is not None:
+            self.fake.seed_instance(seed)
         self.user_statuses = [0, 1, 2, 3]
 
-    @allure.step("Генерация данных пользователя")
-    def generate_single_user(self, username: str = None) -> Dict[str, Any]:
-        """Генерация данных одного пользователя"""
-        user_data = {
-            "id": random.randint(1000, 99999),
+    def build_user(self, username: str = None) -> Dict[str, Any]:
+        """Данные одного пользователя без шага и вложения в Allure (для корпусов и нагрузки)"""
+        return {
+            "id": self.random.randint(1000, 99999),
             "username": username or self.fake.user_name(),
             "firstName": self.fake.first_name(),
             "lastName": self.fake.last_name(),
             "email": self.fake.email(),
             "password": self.fake.password(),
             "phone": self.fake.phone_number(),
-            "userStatus": random.choice(self.user_statuses)
+            "userStatus": self.random.choice(self.user_statuses)
         }
+
+    @allure.step("Генерация данных пользователя")
+    def generate_single_user(self, username: str = None) -> Dict[str, Any]:
+        """Генерация данных одного пользователя"""
+        user_data = self.build_user(username)
         allure.attach(
             json.dumps(user_data, indent=2, ensure_ascii=False),  # <-- Теперь json определен
             name="Сгенерированные данные",
@@ -53,6 +86,10 @@ class UserDataGenerator:
     @allure.step("Генерация невалидных данных: {invalid_type}")
     def generate_invalid_user_data(self, invalid_type: str = "missing_required") -> Dict[str, Any]:
         """Генерация невалидных данных для негативных тестов"""
+        # Категории корпуса называются так же, как invalid_type
+        if self.corpus is not None and invalid_type in self.corpus.categories:
+            return self.corpus.sample(invalid_type, self.random)
+
         if invalid_type == "missing_required":
             return {"userStatus": 1}
 
@@ -0,0 +1,300 @@
+# generators/payload_corpus.py
+# Предварительно сгенерированный корпус валидных и невалидных payload-ов пользователей
+#
+# Корпус строится один раз детерминированно (по seed) и сохраняется на диск.
+# Загрузка - через mmap, выборка - срез готовых JSON-байтов без генерации,
+# поэтому fuzz- и нагрузочные прогоны переиспользуют его между сессиями.
+#
+# Сборка вручную:
+#   python -m generators.payload_corpus --seed 0 --valid 10000
+
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+from importlib.metadata import version
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from generators.data_generator import UserDataGenerator
+
+# Каталог кэша корпусов (относительно корня проекта)
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".corpus")
+
+# Seed корпуса по умолчанию: общий для всех сессий, чтобы файл переиспользовался
+DEFAULT_SEED = 0
+
+# Поля пользователя PetStore
+USER_FIELDS = ["id", "username", "firstName", "lastName", "email", "password", "phone", "userStatus"]
+STRING_FIELDS = ["username", "firstName", "lastName", "email", "password", "phone"]
+
+# Граничные длины строковых полей
+BOUNDARY_LENGTHS = [1, 2, 63, 64, 65, 255, 256, 257, 1000, 4096]
+
+UNICODE_VALUES = [
+    "Пользователь",                          # кириллица
+    "\u7528\u6237\u540d",                    # CJK
+    "\u0627\u0644\u0645\u0633\u062a\u062e\u062f\u0645",  # RTL
+    "\U0001f600\U0001f44d\U0001f3fd\U0001f468\u200d\U0001f469",  # эмодзи, модификатор и ZWJ
+    "e\u0301le\u0300ve",                      # комбинируемые диакритики
+    "zero\u200bwidth",                        # zero-width space
+    "nul\u0000byte",                          # NUL
+    "\ufeffbom",                              # BOM
+    "'; DROP TABLE users;--",
+    "<script>alert(1)</script>",
+]
+
+INVALID_EMAILS = ["not-an-email", "@example.com", "user@", "user@@example.com", "user example@test.com", ""]
+
+INVALID_STATUSES = [-1, 4, 2 ** 31, -(2 ** 31) - 1, "1", None, 1.5, True]
+
+
+class PayloadCorpus:
+    """
+    Корпус payload-ов пользователей в одном бинарном файле, открытом через mmap.
+
+    Формат файла (little-endian):
+        MAGIC | версия u32 | количество записей u32 | длина метаданных u32 |
+        метаданные JSON (категории, seed) | выравнивание до 8 байт |
+        смещения записей (count + 1) x u64 | JSON-тела записей подряд
+
+    Записи одной категории лежат подряд, поэтому категория - это диапазон
+    индексов, а выборка - случайный индекс и срез по смещениям.
+    """
+
+    MAGIC = b"UPC1"
+    VERSION = 1
+    _HEADER = struct.Struct("<4sIII")
+
+    def __init__(self, path: str):
+        """
+        Открытие готового файла корпуса.
+
+        Исключения:
+            ValueError: если файл пустой, обрезан или не является корпусом этой версии
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = None
+        self._view = None
+        try:
+            self._open()
+        except Exception as e:
+            # Файл и mmap закрываются при любой ошибке разбора
+            self.close()
+            if isinstance(e, ValueError):
+                raise
+            raise ValueError(f"Файл {path} поврежден: {e}") from e
+
+    def _open(self):
+        # mmap пустого файла выбрасывает ValueError
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, file_version, count, meta_len = self._HEADER.unpack_from(self._mmap, 0)
+        if magic != self.MAGIC or file_version != self.VERSION:
+            raise ValueError(f"Файл {self.path} не является корпусом payload-ов версии {self.VERSION}")
+
+        meta_start = self._HEADER.size
+        self.meta: Dict[str, Any] = json.loads(self._mmap[meta_start:meta_start + meta_len])
+        self.categories: Dict[str, Tuple[int, int]] = {
+            name: (start, stop) for name, start, stop in self.meta["categories"]
+        }
+        offsets_start = _align(meta_start + meta_len)
+        offsets_stop = offsets_start + (count + 1) * 8
+        if len(self._mmap) < offsets_stop:
+            raise ValueError(f"Файл {self.path} обрезан: нет таблицы смещений")
+        self._view = memoryview(self._mmap)
+        self._offsets = self._view[offsets_start:offsets_stop].cast("Q")
+        self._count = count
+        # Последнее смещение - конец последней записи, он же конец файла
+        if self._offsets[count] != len(self._mmap):
+            raise ValueError(f"Файл {self.path} обрезан: {len(self._mmap)} байт из {self._offsets[count]}")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> "PayloadCorpus":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Освобождение mmap и файла"""
+        if self._view is not None:
+            if getattr(self, "_offsets", None) is not None:
+                self._offsets.release()
+                self._offsets = None
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def raw(self, index: int) -> bytes:
+        """Готовое JSON-тело записи (можно передать в BaseTest без сериализации)"""
+        return self._mmap[self._offsets[index]:self._offsets[index + 1]]
+
+    def get(self, index: int) -> Dict[str, Any]:
+        """Запись в виде словаря (копия, безопасно изменять)"""
+        return json.loads(self.raw(index))
+
+    def indices(self, category: Optional[str] = None) -> range:
+        """
+        Диапазон индексов категории (или всего корпуса).
+
+        Исключения:
+            KeyError: если категории нет в корпусе
+        """
+        if category is None:
+            return range(self._count)
+        return range(*self.categories[category])
+
+    def sample_raw(self, category: Optional[str] = None, rnd: Optional[random.Random] = None) -> bytes:
+        """Случайное готовое JSON-тело из категории"""
+        return self.raw((rnd or random).choice(self.indices(category)))
+
+    def sample(self, category: Optional[str] = None, rnd: Optional[random.Random] = None) -> Dict[str, Any]:
+        """Случайная запись из категории в виде словаря"""
+        return json.loads(self.sample_raw(category, rnd))
+
+    def __iter__(self) -> Iterator[bytes]:
+        return (self.raw(index) for index in range(self._count))
+
+    # --- Сборка ---
+
+    @classmethod
+    def build(cls, path: str, seed: int = DEFAULT_SEED, valid_count: int = 1000,
+              locale: str = "en_US") -> "PayloadCorpus":
+        """
+        Детерминированная сборка корпуса и запись в path.
+
+        Файл пишется во временный и атомарно переименовывается, поэтому
+        параллельные воркеры не увидят недописанный корпус.
+        """
+        categories = _generate(UserDataGenerator(locale, seed=seed), valid_count)
+
+        bodies: List[bytes] = []
+        ranges = []
+        for name, payloads in categories:
+            start = len(bodies)
+            bodies.extend(json.dumps(payload, ensure_ascii=False).encode("utf-8") for payload in payloads)
+            ranges.append([name, start, len(bodies)])
+
+        meta = json.dumps({"seed": seed, "valid_count": valid_count, "locale": locale,
+                           "categories": ranges}).encode("utf-8")
+        offsets_start = _align(cls._HEADER.size + len(meta))
+        data_start = offsets_start + (len(bodies) + 1) * 8
+        offsets = [data_start]
+        for body in bodies:
+            offsets.append(offsets[-1] + len(body))
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(cls._HEADER.pack(cls.MAGIC, cls.VERSION, len(bodies), len(meta)))
+            f.write(meta)
+            f.write(b"\0" * (offsets_start - cls._HEADER.size - len(meta)))
+            f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+            for body in bodies:
+                f.write(body)
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    @classmethod
+    def default_path(cls, seed: int = DEFAULT_SEED, valid_count: int = 1000, locale: str = "en_US") -> str:
+        """Путь кэша; в имени - все параметры, влияющие на содержимое"""
+        name = f"users-v{cls.VERSION}-faker{version('Faker')}-{locale}-seed{seed}-n{valid_count}.bin"
+        return os.path.join(DEFAULT_DIR, name)
+
+    @classmethod
+    def load_or_build(cls, path: Optional[str] = None, seed: int = DEFAULT_SEED, valid_count: int = 1000,
+                      locale: str = "en_US") -> "PayloadCorpus":
+        """
+        Загрузка корпуса из кэша, при отсутствии - сборка.
+
+        Поврежденный файл или корпус с другими seed/valid_count/locale пересобирается.
+        """
+        path = path or cls.default_path(seed, valid_count, locale)
+        if os.path.exists(path):
+            try:
+                corpus = cls(path)
+            except ValueError:
+                pass  # Поврежденный или устаревший файл - пересобираем
+            else:
+                meta = corpus.meta
+                if (meta.get("seed"), meta.get("valid_count"), meta.get("locale")) == (seed, valid_count, locale):
+                    return corpus
+                corpus.close()
+        return cls.build(path, seed, valid_count, locale)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _generate(generator: UserDataGenerator, valid_count: int) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Payload-ы корпуса по категориям"""
+    def user(**overrides) -> Dict[str, Any]:
+        payload = generator.build_user()
+        payload.update(overrides)
+        return payload
+
+    statuses = generator.user_statuses
+    valid = [user(userStatus=statuses[i % len(statuses)]) for i in range(valid_count)]
+
+    missing_required = [{"userStatus": 1}]
+    for field in USER_FIELDS:
+        payload = user()
+        del payload[field]
+        missing_required.append(payload)
+
+    boundary_lengths = [
+        user(**{field: generator.fake.pystr(min_chars=length, max_chars=length)})
+        for field in STRING_FIELDS
+        for length in BOUNDARY_LENGTHS
+    ]
+
+    unicode = [user(**{field: value}) for field in STRING_FIELDS for value in UNICODE_VALUES]
+
+    wrong_types = [
+        user(id="1001"), user(id=None), user(id=1.5), user(id=-1), user(id=2 ** 63),
+        user(username=12345), user(username=None), user(username=["list"]),
+        user(phone=79990000000), user(password={"nested": "object"}),
+    ]
+
+    return [
+        ("valid", valid),
+        ("missing_required", missing_required),
+        ("invalid_email", [user(email=email) for email in INVALID_EMAILS]),
+        ("empty_fields", [{
+            "id": 0, "username": "", "firstName": "", "lastName": "",
+            "email": "", "password": "", "phone": "", "userStatus": 0
+        }]),
+        ("long_strings", [user(username="a" * 1000, firstName="b" * 1000)]),
+        ("boundary_lengths", boundary_lengths),
+        ("unicode", unicode),
+        ("invalid_status", [user(userStatus=status) for status in INVALID_STATUSES]),
+        ("wrong_types", wrong_types),
+        ("empty_object", [{}]),
+    ]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Сборка корпуса payload-ов пользователей")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed генерации")
+    parser.add_argument("--valid", type=int, default=1000, help="Количество валидных пользователей")
+    parser.add_argument("--locale", default="en_US", help="Локаль Faker")
+    parser.add_argument("--path", default=None, help="Файл корпуса (по умолчанию - в каталоге .corpus/)")
+    args = parser.parse_args(argv)
+
+    path = args.path or PayloadCorpus.default_path(args.seed, args.valid, args.locale)
+    with PayloadCorpus.build(path, args.seed, args.valid, args.locale) as corpus:
+        print(f"Корпус собран: {path} ({len(corpus)} записей, {os.path.getsize(path)} байт)")
+        for name, (start, stop) in corpus.categories.items():
+            print(f"  {name:<18} {stop - start}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,522 @@
+# load/distributed.py
+# Распределенная генерация нагрузки: координатор и рабочие процессы
+#
+# Один процесс Python упирается в GIL задолго до нужного RPS, поэтому
+# координатор запускает N локальных процессов (и, опционально, принимает
+# удаленных воркеров по сокету), раздает им шарды сценариев и общее время
+# старта, а затем сливает присланные гистограммы и счетчики.
+#
+# Запуск (нагрузка идет на явно заданный --base-url, а не на публичный PetStore):
+#   python -m benchmarks.stand_in --port 8080
+#   python -m load.distributed run --base-url http://127.0.0.1:8080/v2 \
+#       --scenario load.scenarios:crud_round_trip --workers 4 --duration 60
+#   LOAD_AUTHKEY=... python -m load.distributed worker --connect 10.0.0.1:6000    # удаленный воркер
+#
+# Канал удаленных воркеров передает pickle: любой, кто знает ключ и может
+# подключиться к порту, выполняет код на другой стороне. Поэтому ключ
+# LOAD_AUTHKEY обязателен, а адрес без хоста слушается только на 127.0.0.1.
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import Counter
+from multiprocessing.connection import Client, Connection, Listener, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from base.base_test import BaseTest
+from base.live_metrics import LiveMetrics
+from base.metrics import RequestStats
+from generators.data_generator import UserDataGenerator, derive_seed
+
+# Переменная окружения с ключом аутентификации удаленных воркеров (значения по умолчанию нет)
+AUTHKEY_ENV = "LOAD_AUTHKEY"
+
+# Задержка между рассылкой времени старта и самим стартом, в секундах
+START_DELAY = 1.0
+
+
+def load_scenario(spec: str) -> Callable[[BaseTest, UserDataGenerator], Any]:
+    """
+    Загрузка функции сценария по строке вида "module.path:function".
+
+    Исключения:
+        ValueError: если строка не содержит ":"
+    """
+    module_name, sep, attr = spec.partition(":")
+    if not sep:
+        raise ValueError(f"Сценарий должен быть в формате 'module:function', получено: {spec}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def authkey_from_env() -> bytes:
+    """
+    Ключ аутентификации удаленных воркеров из LOAD_AUTHKEY.
+
+    Исключения:
+        ValueError: если переменная не задана или пуста
+    """
+    authkey = os.environ.get(AUTHKEY_ENV, "")
+    if not authkey:
+        raise ValueError(f"Для удаленных воркеров задайте секретный ключ в переменной {AUTHKEY_ENV} "
+                         f"(одинаковый у координатора и воркеров)")
+    return authkey.encode()
+
+
+def split_evenly(total: Optional[int], parts: int) -> List[Optional[int]]:
+    """Разбиение total на parts почти равных частей (None - без ограничения)"""
+    if total is None:
+        return [None] * parts
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+# --- Воркер ---
+
+def _run_thread(scenarios: List[Callable], shard: Dict[str, Any], thread_index: int,
+                iterations: Optional[int], start_at: float, outbox: "queue.Queue", bases: List[BaseTest]):
+    """
+    Цикл одного потока воркера.
+
+    Каждый поток пишет в собственный RequestStats и периодически отдает его
+    в outbox, начиная новый: блокировки на пути запроса не нужны,
+    а сумма всех отданных частей равна полной статистике.
+
+    Сценарии чередуются по итерациям со сдвигом на номер потока, поэтому
+    каждый сценарий выполняется при любом числе воркеров и потоков.
+    Клиент потока добавляется в bases: по его current_request воркер
+    считает запросы в полете.
+    """
+    stats = RequestStats()
+    base = BaseTest(base_url=shard["base_url"], stats=stats, reporting=False)
+    bases.append(base)
+    # Свой seed у каждого потока каждого воркера - прогон воспроизводим
+    seed = shard["seed"]
+    generator = UserDataGenerator(
+        seed=derive_seed(seed, shard["worker_id"], thread_index) if seed is not None else None
+    )
+    deadline = start_at + shard["duration"] if shard["duration"] else None
+    interval = shard["report_interval"]
+    next_flush = time.monotonic() + interval
+    done = failed = 0
+    offset = shard["worker_id"] * shard["threads"] + thread_index
+
+    while (iterations is None or done < iterations) and (deadline is None or time.time() < deadline):
+        try:
+            scenarios[(offset + done) % len(scenarios)](base, generator)
+        except Exception:
+            # Ошибки HTTP уже учтены в stats, здесь считаем упавшие итерации
+            failed += 1
+        done += 1
+
+        now = time.monotonic()
+        if now >= next_flush:
+            outbox.put(("stats", stats))
+            stats = base.stats = RequestStats()
+            next_flush = now + interval
+
+    outbox.put(("stats", stats))
+    outbox.put(("finished", done, failed))
+
+
+def run_worker(conn: Connection):
+    """
+    Выполнение шарда, полученного от координатора через соединение conn.
+
+    Протокол:
+        координатор -> воркер: ("shard", dict), затем ("start", время_старта)
+        воркер -> координатор: ("ready", id), ("stats", id, RequestStats, в_полете)...,
+                               ("done", id, dict) или ("error", id, traceback)
+        где в_полете - словарь {эндпоинт: запросов в полете} на момент отправки
+    """
+    worker_id = None
+    try:
+        _, shard = conn.recv()
+        worker_id = shard["worker_id"]
+        scenarios = [load_scenario(spec) for spec in shard["scenarios"]]
+        # Подготовка сценариев (загрузка корпусов и т.п.) - до готовности, вне замера
+        for scenario in scenarios:
+            prepare = getattr(scenario, "prepare", None)
+            if prepare is not None:
+                prepare()
+        conn.send(("ready", worker_id))
+
+        _, start_at = conn.recv()
+        outbox: "queue.Queue" = queue.Queue()
+        bases: List[BaseTest] = []
+        threads = [
+            threading.Thread(target=_run_thread,
+                             args=(scenarios, shard, index, iterations, start_at, outbox, bases), daemon=True)
+            for index, iterations in enumerate(split_evenly(shard["iterations"], shard["threads"]))
+        ]
+
+        # Синхронный старт всех воркеров по общему времени
+        time.sleep(max(0.0, start_at - time.time()))
+        for thread in threads:
+            thread.start()
+
+        iterations = failures = finished = 0
+        delta = RequestStats()
+        next_send = time.monotonic() + shard["report_interval"]
+        while finished < len(threads):
+            try:
+                message = outbox.get(timeout=max(0.0, next_send - time.monotonic()))
+                if message[0] == "stats":
+                    delta.merge(message[1])
+                else:
+                    finished += 1
+                    iterations += message[1]
+                    failures += message[2]
+            except queue.Empty:
+                pass
+            if time.monotonic() >= next_send:
+                # Стриминг промежуточной статистики координатору
+                conn.send(("stats", worker_id, delta, _in_flight(bases)))
+                delta = RequestStats()
+                next_send = time.monotonic() + shard["report_interval"]
+
+        conn.send(("stats", worker_id, delta, {}))
+        conn.send(("done", worker_id, {"iterations": iterations, "failures": failures, "finished": time.time()}))
+    except Exception:
+        conn.send(("error", worker_id, traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+def _in_flight(bases: List[BaseTest]) -> Dict[str, int]:
+    """Запросы в полете по эндпоинтам: у каждого потока не больше одного"""
+    return dict(Counter(key for key in (base.current_request for base in list(bases)) if key is not None))
+
+
+def connect_worker(address: Tuple[str, int], authkey: bytes):
+    """Подключение удаленного воркера к координатору и выполнение его шарда"""
+    print(f"[воркер] Подключение к координатору {address[0]}:{address[1]}")
+    run_worker(Client(address, authkey=authkey))
+
+
+# --- Координатор ---
+
+class LoadReport:
+    """Итог распределенного прогона: слитая статистика и пропускная способность"""
+
+    def __init__(self, stats: RequestStats, workers: int, iterations: int, failures: int, elapsed: float):
+        self.stats = stats
+        self.workers = workers
+        self.iterations = iterations
+        self.failures = failures
+        self.elapsed = elapsed
+
+    @property
+    def rps(self) -> float:
+        """Суммарное количество запросов в секунду по всем воркерам"""
+        return self.stats.total_requests / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "iterations": self.iterations,
+            "failed_iterations": self.failures,
+            "elapsed_s": round(self.elapsed, 3),
+            "requests": self.stats.total_requests,
+            "errors": self.stats.total_errors,
+            "rps": round(self.rps, 1),
+            "endpoints": self.stats.summary(),
+            "histograms": self.stats.to_dict(),
+        }
+
+    def print_summary(self):
+        """Вывод сводной таблицы в консоль"""
+        print("\n" + "=" * 50)
+        print("ИТОГИ НАГРУЗКИ")
+        print("=" * 50)
+        print(f"Воркеров: {self.workers}, итераций: {self.iterations} (упало: {self.failures})")
+        print(f"Запросов: {self.stats.total_requests}, ошибок: {self.stats.total_errors}, "
+              f"время: {self.elapsed:.2f} с, RPS: {self.rps:.1f}")
+        for key, item in self.stats.summary().items():
+            print(f"  {key:<28} n={item['requests']:<8} err={item['errors']:<6} "
+                  f"p50={item['p50_ms']:.2f}ms p90={item['p90_ms']:.2f}ms "
+                  f"p99={item['p99_ms']:.2f}ms max={item['max_ms']:.2f}ms")
+
+
+class Coordinator:
+    """
+    Координатор распределенного прогона.
+
+    Запускает локальные процессы-воркеры, при необходимости ждет подключения
+    удаленных воркеров, раздает шарды и общее время старта, а затем сливает
+    потоковую статистику в один RequestStats. Гистограммы сливаются точно,
+    поэтому итоговые перцентили не являются средними по воркерам.
+    """
+
+    def __init__(
+            self,
+            scenarios: List[str],
+            workers: Optional[int] = None,
+            threads: int = 1,
+            duration: Optional[float] = None,
+            iterations: Optional[int] = None,
+            base_url: Optional[str] = None,
+            listen: Optional[Tuple[str, int]] = None,
+            remote_workers: int = 0,
+            authkey: Optional[bytes] = None,
+            seed: Optional[int] = None,
+            report_interval: float = 1.0,
+            on_progress: Optional[Callable[[RequestStats, float], None]] = None,
+            on_stats: Optional[Callable[[RequestStats, Dict[str, int]], None]] = None
+    ):
+        """
+        Аргументы:
+            scenarios: Сценарии "module:function", чередуются по итерациям в каждом потоке
+            workers: Количество локальных процессов (по умолчанию - число ядер)
+            threads: Потоков в каждом воркере
+            duration: Длительность прогона в секундах
+            iterations: Общее количество итераций (делится между воркерами и потоками)
+            base_url: URL API вместо BaseTest.BASE_URL
+            listen: Адрес (host, port) для подключения удаленных воркеров
+            remote_workers: Сколько удаленных воркеров ждать на listen
+            authkey: Ключ аутентификации удаленных воркеров (обязателен при remote_workers)
+            seed: Базовый seed генерации данных (None - случайные данные)
+            report_interval: Период стриминга статистики от воркеров, в секундах
+            on_progress: Колбэк (слитая статистика, секунд с начала) на каждый интервал
+            on_stats: Колбэк (дельта статистики, запросы в полете по всем воркерам) на каждое
+                сообщение воркера со статистикой (например, LiveMetrics.ingest)
+
+        Исключения:
+            ValueError: если не задано ни duration, ни iterations, нет сценариев,
+                нет ни одного воркера или для удаленных воркеров не задан authkey
+        """
+        if not duration and not iterations:
+            raise ValueError("Нужно задать duration или iterations")
+        if not scenarios:
+            raise ValueError("Нужен хотя бы один сценарий")
+        if remote_workers and not listen:
+            raise ValueError("Для удаленных воркеров нужен адрес listen")
+        if remote_workers and not authkey:
+            raise ValueError("Для удаленных воркеров нужен ключ authkey")
+        self.scenarios = scenarios
+        self.local_workers = workers if workers is not None else (os.cpu_count() or 1)
+        if self.local_workers + remote_workers < 1:
+            raise ValueError("Нужен хотя бы один локальный или удаленный воркер")
+        self.threads = threads
+        self.duration = duration
+        self.iterations = iterations
+        self.base_url = base_url
+        self.listen = listen
+        self.remote_workers = remote_workers
+        self.authkey = authkey
+        self.seed = seed
+        self.report_interval = report_interval
+        self.on_progress = on_progress or self._print_progress
+        self.on_stats = on_stats
+
+    @staticmethod
+    def _print_progress(stats: RequestStats, elapsed: float):
+        rps = stats.total_requests / elapsed if elapsed > 0 else 0.0
+        print(f"[нагрузка] {elapsed:6.1f} с  запросов: {stats.total_requests}  "
+              f"ошибок: {stats.total_errors}  RPS: {rps:.1f}")
+
+    def _shards(self, count: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "worker_id": worker_id,
+                "scenarios": self.scenarios,
+                "base_url": self.base_url,
+                "threads": self.threads,
+                "duration": self.duration,
+                "iterations": iterations,
+                "report_interval": self.report_interval,
+                "seed": self.seed,
+            }
+            for worker_id, iterations in enumerate(split_evenly(self.iterations, count))
+        ]
+
+    def run(self) -> LoadReport:
+        """
+        Выполнение прогона и сбор итогового отчета.
+
+        Исключения:
+            RuntimeError: если хотя бы один воркер завершился с ошибкой
+        """
+        self._prepare_scenarios()
+        context = multiprocessing.get_context("spawn")
+        connections: List[Connection] = []
+        processes = []
+        listener = Listener(self.listen, authkey=self.authkey) if self.remote_workers else None
+
+        try:
+            for _ in range(self.local_workers):
+                parent_conn, child_conn = context.Pipe()
+                process = context.Process(target=run_worker, args=(child_conn,), daemon=True)
+                process.start()
+                child_conn.close()
+                processes.append(process)
+                connections.append(parent_conn)
+
+            if listener is not None:
+                print(f"[координатор] Ожидание {self.remote_workers} удаленных воркеров на "
+                      f"{self.listen[0]}:{self.listen[1]}")
+                for _ in range(self.remote_workers):
+                    connections.append(listener.accept())
+
+            for conn, shard in zip(connections, self._shards(len(connections))):
+                conn.send(("shard", shard))
+            for conn in connections:
+                message = conn.recv()
+                if message[0] == "error":
+                    raise RuntimeError(f"Воркер {message[1]} не запустился:\n{message[2]}")
+
+            # Общее время старта для всех воркеров (wall clock - общий и для удаленных хостов)
+            start_at = time.time() + START_DELAY
+            for conn in connections:
+                conn.send(("start", start_at))
+
+            return self._collect(connections, start_at)
+        finally:
+            for conn in connections:
+                conn.close()
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            if listener is not None:
+                listener.close()
+
+    def _prepare_scenarios(self):
+        """
+        Подготовка сценариев в координаторе до запуска воркеров.
+
+        Общие кэши на диске (например, корпус payload-ов) собираются здесь один
+        раз, а prepare в воркерах только загружает готовый файл: иначе все
+        процессы одновременно собирали бы его и заменяли файл, открытый
+        через mmap в соседних процессах (на Windows это PermissionError).
+        """
+        for spec in self.scenarios:
+            try:
+                scenario = load_scenario(spec)
+            except Exception:
+                continue  # Ошибку загрузки сценария сообщит воркер
+            prepare = getattr(scenario, "prepare", None)
+            if prepare is not None:
+                prepare()
+
+    def _collect(self, connections: List[Connection], start_at: float) -> LoadReport:
+        stats = RequestStats()
+        iterations = failures = 0
+        finished_at = start_at
+        pending = list(connections)
+        # Последние присланные запросы в полете по каждому воркеру
+        in_flight: Dict[Any, Dict[str, int]] = {}
+        next_progress = time.monotonic() + START_DELAY + self.report_interval
+
+        while pending:
+            for conn in wait(pending, timeout=self.report_interval):
+                try:
+                    message = conn.recv()
+                except EOFError:
+                    raise RuntimeError("Воркер разорвал соединение до завершения прогона")
+                kind, worker_id, payload = message[:3]
+                if kind == "stats":
+                    in_flight[worker_id] = message[3]
+                    if self.on_stats is not None:
+                        self.on_stats(payload, dict(sum((Counter(item) for item in in_flight.values()), Counter())))
+                    stats.merge(payload)
+                elif kind == "done":
+                    iterations += payload["iterations"]
+                    failures += payload["failures"]
+                    finished_at = max(finished_at, payload["finished"])
+                    pending.remove(conn)
+                else:
+                    raise RuntimeError(f"Ошибка в воркере {worker_id}:\n{payload}")
+
+            if time.monotonic() >= next_progress:
+                self.on_progress(stats, time.time() - start_at)
+                next_progress = time.monotonic() + self.report_interval
+
+        return LoadReport(stats, len(connections), iterations, failures, finished_at - start_at)
+
+
+def _parse_address(value: str) -> Tuple[str, int]:
+    """Адрес host:port; без хоста - только локальный интерфейс"""
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Распределенная нагрузка на API управления пользователями")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Запуск координатора и локальных воркеров")
+    run.add_argument("--scenario", action="append", required=True,
+                     help="Сценарий module:function (можно указать несколько)")
+    run.add_argument("--workers", type=int, default=None, help="Локальных процессов (по умолчанию - число ядер)")
+    run.add_argument("--threads", type=int, default=1, help="Потоков в каждом воркере")
+    run.add_argument("--duration", type=float, default=None, help="Длительность, секунд")
+    run.add_argument("--iterations", type=int, default=None, help="Общее количество итераций")
+    run.add_argument("--base-url", required=True,
+                     help="URL API, например локального стенда (python -m benchmarks.stand_in)")
+    run.add_argument("--listen", type=_parse_address, default=None,
+                     help="host:port для удаленных воркеров (без хоста - 127.0.0.1; нужен LOAD_AUTHKEY)")
+    run.add_argument("--remote-workers", type=int, default=0, help="Количество удаленных воркеров")
+    run.add_argument("--seed", type=int, default=None, help="Seed генерации данных для воспроизводимости")
+    run.add_argument("--json", dest="json_path", default=None, help="Сохранить отчет в JSON")
+    run.add_argument("--live-metrics-port", type=int, default=None,
+                     help="Порт эндпоинта /metrics в формате Prometheus с агрегатом по всем воркерам")
+    run.add_argument("--live-metrics-host", default="127.0.0.1",
+                     help="Интерфейс эндпоинта /metrics (по умолчанию только локальный)")
+    run.add_argument("--live-metrics-interval", type=float, default=0,
+                     help="Период вывода live-сводки по эндпоинтам, секунд (0 - только общий прогресс)")
+
+    worker = commands.add_parser("worker", help="Удаленный воркер")
+    worker.add_argument("--connect", type=_parse_address, required=True,
+                        help="host:port координатора (нужен LOAD_AUTHKEY)")
+
+    args = parser.parse_args(argv)
+    authkey = None
+    if args.command == "worker" or args.listen is not None:
+        try:
+            authkey = authkey_from_env()
+        except ValueError as error:
+            parser.error(str(error))
+    if args.command == "worker":
+        connect_worker(args.connect, authkey)
+        return
+
+    live = None
+    if args.live_metrics_port is not None or args.live_metrics_interval:
+        live = LiveMetrics()
+        if args.live_metrics_port is not None:
+            port = live.start_server(args.live_metrics_port, host=args.live_metrics_host)
+            print(f"[координатор] Live-метрики: http://{args.live_metrics_host}:{port}/metrics")
+        if args.live_metrics_interval:
+            live.start_reporter(args.live_metrics_interval)
+
+    report = Coordinator(
+        scenarios=args.scenario,
+        workers=args.workers,
+        threads=args.threads,
+        duration=args.duration,
+        iterations=args.iterations,
+        base_url=args.base_url,
+        listen=args.listen,
+        remote_workers=args.remote_workers,
+        authkey=authkey,
+        seed=args.seed,
+        on_stats=live.ingest if live is not None else None,
+    ).run()
+    if live is not None:
+        live.stop()
+    report.print_summary()
+
+    if args.json_path:
+        os.makedirs(os.path.dirname(args.json_path) or ".", exist_ok=True)
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
+        print(f"Отчет сохранен: {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
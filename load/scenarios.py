@@ -0,0 +1,60 @@
+# load/scenarios.py
+# Сценарии нагрузочного прогона
+# Сценарий - функция (base, generator), выполняющая одну итерацию нагрузки.
+# Необязательный атрибут prepare - функция без аргументов: координатор
+# вызывает ее до запуска воркеров (общие кэши собираются один раз), а каждый
+# воркер - до сигнала готовности (загрузка вне замеряемого окна)
+
+import threading
+from typing import Optional
+
+from base.base_test import BaseTest
+from generators.data_generator import UserDataGenerator
+from generators.payload_corpus import PayloadCorpus
+
+# Корпус открывается один раз на процесс воркера (mmap общий для всех потоков)
+_corpus: Optional[PayloadCorpus] = None
+_corpus_lock = threading.Lock()
+
+
+def _get_corpus() -> PayloadCorpus:
+    global _corpus
+    with _corpus_lock:
+        if _corpus is None:
+            _corpus = PayloadCorpus.load_or_build()
+    return _corpus
+
+
+def crud_round_trip(base: BaseTest, generator: UserDataGenerator):
+    """Полный цикл: создание, получение, обновление и удаление пользователя"""
+    user = generator.build_user()
+    # Уникальный username, чтобы потоки и процессы не пересекались
+    # (суффикс из генератора потока - воспроизводим при заданном seed)
+    username = f"{user['username']}_{generator.random.getrandbits(48):012x}"
+    user["username"] = username
+
+    base.create_user(user)
+    base.get_user(username)
+    user["firstName"] = "Updated"
+    base.update_user(username, user)
+    base.delete_user(username, allow_failure=True)
+
+
+def login_logout(base: BaseTest, generator: UserDataGenerator):
+    """Вход и выход из системы без создания пользователя"""
+    base.login("load_user", "load_password")
+    base.logout()
+
+
+def create_user(base: BaseTest, generator: UserDataGenerator):
+    """Только создание пользователя (без очистки)"""
+    base.create_user(generator.build_user())
+
+
+def create_user_from_corpus(base: BaseTest, generator: UserDataGenerator):
+    """Создание пользователя готовым телом из корпуса (валидные и невалидные payload-ы)"""
+    base.create_user(_get_corpus().sample_raw(rnd=generator.random))
+
+
+# Корпус собирается координатором, а воркерами загружается до старта, а не на первой итерации
+create_user_from_corpus.prepare = _get_corpus
@@ -0,0 +1,72 @@
+import pytest
+import allure
+
+from base.base_test import BaseTest
+from benchmarks import run_benchmarks
+from benchmarks.run_benchmarks import crud_throughput, measure
+
+
+@allure.feature("Бенчмарки")
+class TestBenchmarks:
+    """Тесты локального стенда и замеров бенчмарков"""
+
+    @allure.story("Локальный стенд")
+    @allure.title("CRUD и авторизация через BaseTest на локальном стенде")
+    @pytest.mark.performance
+    def test_stand_in_crud(self, stand_in):
+        """Стенд отвечает на запросы BaseTest так же, как PetStore"""
+        base = BaseTest(base_url=stand_in.base_url, reporting=False)
+        user = {"id": 1, "username": "bench", "firstName": "A", "lastName": "B",
+                "email": "a@b.c", "password": "p", "phone": "1", "userStatus": 0}
+
+        assert base.create_user(user).json()["code"] == 200
+        assert base.get_user("bench").json() == user
+        assert base.update_user("bench", dict(user, firstName="C")).status_code == 200
+        assert "logged in user session:" in base.login("bench", "p").text
+        assert "X-Rate-Limit" in base.login("bench", "p").headers
+        assert base.delete_user("bench").status_code == 200
+        assert base.delete_user("bench", allow_failure=True).status_code == 404
+
+        # username со "/" и "?" экранируется и не меняет путь запроса
+        odd = dict(user, username="<script>alert(1)</script>?x")
+        base.create_user(odd)
+        assert base.get_user(odd["username"]).json() == odd
+        assert base.delete_user(odd["username"]).status_code == 200
+
+    @allure.story("Замеры")
+    @allure.title("Результат замера содержит статистику по повторам")
+    @pytest.mark.performance
+    def test_measure_result(self):
+        """measure возвращает время на операцию и пропускную способность"""
+        result = measure(lambda: sum(range(100)), number=100, repeat=3, per_call=2)
+
+        assert result["unit"] == "us/op"
+        assert result["ops"] == 200
+        assert 0 < result["min"] <= result["median"]
+        assert result["ops_per_s"] > 0
+
+    @allure.story("Замеры")
+    @allure.title("CRUD-замер считает ошибки итераций и не зависает на ошибке прогрева")
+    @pytest.mark.performance
+    def test_crud_throughput_errors(self, stand_in, monkeypatch):
+        """Ошибки замеряемых итераций попадают в errors, ошибка прогрева - в RuntimeError"""
+        result = crud_throughput(stand_in.base_url, concurrency=2, duration=0.2)
+        assert result["round_trips"] > 0
+        assert result["errors"] == 0
+
+        calls = []
+        real_round_trip = run_benchmarks.scenarios.crud_round_trip
+
+        def flaky_round_trip(base, generator):
+            calls.append(None)
+            if len(calls) > 2:  # Прогрев обоих потоков проходит, дальше - ошибки
+                raise ConnectionError("сбой")
+            real_round_trip(base, generator)
+
+        monkeypatch.setattr(run_benchmarks.scenarios, "crud_round_trip", flaky_round_trip)
+        result = crud_throughput(stand_in.base_url, concurrency=2, duration=0.1)
+        assert result["round_trips"] == 0
+        assert result["errors"] > 0
+
+        with pytest.raises(RuntimeError, match="Прогрев"):
+            crud_throughput("http://127.0.0.1:1/v2", concurrency=2, duration=1)
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+import allure
+
+from generators.data_generator import UserDataGenerator, derive_seed
+from generators.payload_corpus import PayloadCorpus
+
+
+@allure.feature("Генерация тестовых данных")
+class TestDataGenerator:
+    """Тесты воспроизводимой генерации данных и корпуса payload-ов"""
+
+    @allure.story("Seed генерации")
+    @allure.title("Одинаковый seed дает одинаковые данные")
+    @pytest.mark.regression
+    def test_seeded_generation_is_reproducible(self):
+        """Два генератора с одним seed выдают одинаковых пользователей"""
+        first = UserDataGenerator(seed=123).generate_bulk_users(5)
+        second = UserDataGenerator(seed=123).generate_bulk_users(5)
+        other = UserDataGenerator(seed=124).generate_bulk_users(5)
+
+        assert first == second
+        assert first != other
+        assert derive_seed(1, "test_a") == derive_seed(1, "test_a") != derive_seed(1, "test_b")
+
+    @allure.story("Корпус payload-ов")
+    @allure.title("Сборка, загрузка и выборка из корпуса")
+    @pytest.mark.regression
+    def test_payload_corpus_round_trip(self, tmp_path):
+        """Корпус детерминирован, читается через mmap и покрывает все категории"""
+        first_path, second_path = tmp_path / "first.bin", tmp_path / "second.bin"
+        with PayloadCorpus.build(str(first_path), seed=7, valid_count=20) as corpus:
+            assert list(corpus.indices("valid")) == list(range(20))
+            assert {corpus.get(index)["userStatus"] for index in corpus.indices("valid")} == {0, 1, 2, 3}
+            assert corpus.get(corpus.indices("missing_required")[0]) == {"userStatus": 1}
+            assert len(corpus.sample("long_strings")["username"]) == 1000
+            for category in ("invalid_email", "boundary_lengths", "unicode", "invalid_status"):
+                assert isinstance(corpus.sample(category), dict)
+
+        PayloadCorpus.build(str(second_path), seed=7, valid_count=20).close()
+        assert first_path.read_bytes() == second_path.read_bytes()
+
+        with PayloadCorpus.load_or_build(str(first_path), seed=7, valid_count=20) as loaded:
+            assert loaded.meta["seed"] == 7
+            assert json.loads(loaded.raw(0))["username"]
+
+    @allure.story("Корпус payload-ов")
+    @allure.title("Пустой, обрезанный и несовпадающий корпус пересобирается")
+    @pytest.mark.regression
+    def test_payload_corpus_rebuilds_invalid_file(self, tmp_path):
+        """load_or_build не отдает поврежденный корпус или корпус с другими параметрами"""
+        path = tmp_path / "corpus.bin"
+
+        path.write_bytes(b"")
+        with pytest.raises(ValueError):
+            PayloadCorpus(str(path))
+        PayloadCorpus.load_or_build(str(path), seed=3, valid_count=10).close()
+
+        data = path.read_bytes()
+        path.write_bytes(data[:-100])
+        with pytest.raises(ValueError, match="обрезан"):
+            PayloadCorpus(str(path))
+        with PayloadCorpus.load_or_build(str(path), seed=3, valid_count=10) as corpus:
+            assert all(isinstance(corpus.get(index), dict) for index in corpus.indices())
+        assert path.read_bytes() == data
+
+        with PayloadCorpus.load_or_build(str(path), seed=4, valid_count=12) as corpus:
+            assert corpus.meta["seed"] == 4
+            assert len(corpus.indices("valid")) == 12
+
+    @allure.story("Корпус payload-ов")
+    @allure.title("Невалидные данные генератора берутся из корпуса")
+    @pytest.mark.regression
+    def test_invalid_user_data_from_corpus(self, tmp_path):
+        """generate_invalid_user_data выбирает записи корпуса детерминированно по seed"""
+        with PayloadCorpus.build(str(tmp_path / "corpus.bin"), seed=1, valid_count=10) as corpus:
+            first = UserDataGenerator(seed=9, corpus=corpus)
+            second = UserDataGenerator(seed=9, corpus=corpus)
+
+            assert ([first.generate_invalid_user_data("unicode") for _ in range(5)]
+                    == [second.generate_invalid_user_data("unicode") for _ in range(5)])
+            assert first.generate_invalid_user_data("empty_fields")["username"] == ""
+            assert len(first.generate_invalid_user_data("long_strings")["username"]) == 1000
+            # Неизвестная корпусу категория обрабатывается как раньше
+            assert first.generate_invalid_user_data("other") == {"invalid": "data"}
@@ -0,0 +1,216 @@
+import random
+
+import pytest
+import allure
+
+from base.live_metrics import LiveMetrics
+from base.metrics import LatencyHistogram, RequestStats
+from load import scenarios
+from load.distributed import Coordinator, _parse_address, main, split_evenly
+
+
+@allure.feature("Нагрузочные метрики")
+class TestLoadMetrics:
+    """Тесты сбора и слияния метрик нагрузочного прогона"""
+
+    @allure.story("Гистограмма латентности")
+    @allure.title("Слияние гистограмм совпадает с прямой записью")
+    @pytest.mark.performance
+    def test_histogram_merge_is_exact(self):
+        """Перцентили слитой гистограммы равны перцентилям общей"""
+        rnd = random.Random(42)
+        values = [int(rnd.lognormvariate(9, 1)) for _ in range(5000)]
+
+        combined = LatencyHistogram()
+        parts = [LatencyHistogram() for _ in range(4)]
+        for i, value in enumerate(values):
+            combined.record(value)
+            parts[i % 4].record(value)
+
+        merged = LatencyHistogram()
+        for part in parts:
+            merged.merge(part)
+
+        assert merged.counts == combined.counts
+        assert merged.count == len(values)
+        for q in (50, 90, 99, 99.9, 100):
+            assert merged.percentile(q) == combined.percentile(q)
+
+    @allure.story("Гистограмма латентности")
+    @allure.title("Погрешность корзин не превышает 1/64")
+    @pytest.mark.performance
+    def test_histogram_bucket_precision(self):
+        """Каждое значение лежит в границах своей корзины"""
+        for value in list(range(0, 300)) + [1_000, 65_535, 1_000_000, 30_000_000]:
+            low, high = LatencyHistogram.bucket_bounds(LatencyHistogram.bucket_index(value))
+            assert low <= value <= high
+            assert high - low <= max(0, low) / LatencyHistogram.SUB_BUCKETS
+
+    @allure.story("Статистика запросов")
+    @allure.title("Сериализация и слияние статистики по эндпоинтам")
+    @pytest.mark.performance
+    def test_request_stats_round_trip(self):
+        """Статистика переживает to_dict/from_dict и корректно сливается"""
+        first, second = RequestStats(), RequestStats()
+        first.record("GET /user/{username}", 0.010)
+        first.record("POST /user", 0.020, ok=False)
+        second.record("GET /user/{username}", 0.030)
+
+        merged = RequestStats.from_dict(first.to_dict()).merge(second)
+
+        assert merged.total_requests == 3
+        assert merged.total_errors == 1
+        assert merged.endpoints["GET /user/{username}"].latency.max == 30_000
+
+    @allure.story("Распределенная нагрузка")
+    @allure.title("Разбиение итераций между воркерами")
+    @pytest.mark.performance
+    def test_split_evenly(self):
+        """Итерации делятся почти поровну и без потерь"""
+        assert split_evenly(10, 3) == [4, 3, 3]
+        assert split_evenly(2, 4) == [1, 1, 0, 0]
+        assert split_evenly(None, 2) == [None, None]
+
+    @allure.story("Распределенная нагрузка")
+    @allure.title("Координатор сливает статистику воркеров без потерь")
+    @pytest.mark.performance
+    def test_coordinator_merges_worker_stats(self, stand_in):
+        """Все итерации выполнены, счетчики запросов слиты точно"""
+        report = Coordinator(
+            scenarios=["load.scenarios:login_logout"],
+            workers=2,
+            threads=2,
+            iterations=25,
+            base_url=stand_in.base_url,
+            report_interval=0.05,
+            on_progress=lambda stats, elapsed: None,
+        ).run()
+
+        assert report.workers == 2
+        assert report.iterations == 25
+        assert report.failures == 0
+        assert report.stats.total_requests == 50
+        assert report.stats.total_errors == 0
+        assert report.stats.endpoints["GET /user/login"].requests == 25
+        assert report.stats.endpoints["GET /user/logout"].latency.count == 25
+
+    @allure.story("Распределенная нагрузка")
+    @allure.title("Все сценарии выполняются при одном воркере")
+    @pytest.mark.performance
+    def test_coordinator_rotates_scenarios(self, stand_in):
+        """Сценарии чередуются по итерациям, а не раздаются по воркерам"""
+        report = Coordinator(
+            scenarios=["load.scenarios:login_logout", "load.scenarios:create_user"],
+            workers=1,
+            iterations=4,
+            base_url=stand_in.base_url,
+            on_progress=lambda stats, elapsed: None,
+        ).run()
+
+        assert report.stats.endpoints["GET /user/login"].requests == 2
+        assert report.stats.endpoints["POST /user"].requests == 2
+
+    @allure.story("Распределенная нагрузка")
+    @allure.title("Подготовка сценариев выполняется координатором до запуска воркеров")
+    @pytest.mark.performance
+    def test_coordinator_prepares_scenarios(self, stand_in, monkeypatch):
+        """Корпус собирается один раз в координаторе, воркеры только загружают его"""
+        monkeypatch.setattr(scenarios, "_corpus", None)
+        report = Coordinator(
+            scenarios=["load.scenarios:create_user_from_corpus"],
+            workers=2,
+            iterations=4,
+            base_url=stand_in.base_url,
+            on_progress=lambda stats, elapsed: None,
+        ).run()
+
+        assert scenarios._corpus is not None
+        assert report.stats.endpoints["POST /user"].requests == 4
+        scenarios._corpus.close()
+
+    @allure.story("Live-метрики")
+    @allure.title("Запросы в полете передаются от воркеров в live-метрики координатора")
+    @pytest.mark.performance
+    def test_coordinator_reports_in_flight(self, stand_in):
+        """Воркеры присылают запросы в полете вместе с дельтами, LiveMetrics их отображает"""
+        reports = []
+        Coordinator(
+            scenarios=["load.scenarios:login_logout"],
+            workers=1,
+            threads=4,
+            duration=1.0,
+            base_url=stand_in.base_url,
+            report_interval=0.05,
+            on_progress=lambda stats, elapsed: None,
+            on_stats=lambda stats, in_flight: reports.append(in_flight),
+        ).run()
+
+        assert max(sum(in_flight.values()) for in_flight in reports) > 0
+        assert reports[-1] == {}
+
+        live = LiveMetrics()
+        live.ingest(RequestStats(), {"GET /user/login": 3})
+        assert live.snapshot()["GET /user/login"]["in_flight"] == 3
+        live.ingest(RequestStats(), {})
+        assert live.snapshot()["GET /user/login"]["in_flight"] == 0
+
+    @allure.story("Распределенная нагрузка")
+    @allure.title("Ошибка воркера и неверная конфигурация")
+    @pytest.mark.performance
+    def test_coordinator_errors(self, monkeypatch):
+        """Ошибка загрузки сценария доходит до координатора, пустой пул воркеров и канал без ключа запрещены"""
+        with pytest.raises(ValueError):
+            Coordinator(scenarios=["load.scenarios:login_logout"], workers=0, iterations=1)
+        with pytest.raises(ValueError, match="authkey"):
+            Coordinator(scenarios=["load.scenarios:login_logout"], iterations=1,
+                        listen=("127.0.0.1", 0), remote_workers=1)
+        monkeypatch.delenv("LOAD_AUTHKEY", raising=False)
+        with pytest.raises(SystemExit):
+            main(["worker", "--connect", "6000"])
+        assert _parse_address("6000") == ("127.0.0.1", 6000)
+
+        with pytest.raises(RuntimeError, match="не запустился"):
+            Coordinator(scenarios=["load.scenarios:missing"], workers=1, iterations=1).run()
+
+    @allure.story("Live-метрики")
+    @allure.title("Экспорт live-метрик в формате Prometheus")
+    @pytest.mark.performance
+    def test_live_metrics_prometheus(self):
+        """Счетчики, запросы в полете и квантили попадают в /metrics"""
+        live = LiveMetrics(window=10)
+        live.request_started("GET /user/{username}")
+        live.request_started("POST /user")
+        live.request_finished("POST /user", 0.005, ok=True)
+        live.request_started("POST /user")
+        live.request_finished("POST /user", 0.050, ok=False)
+
+        snapshot = live.snapshot()
+        assert snapshot["GET /user/{username}"]["in_flight"] == 1
+        assert snapshot["POST /user"]["error_rate"] == 0.5
+
+        text = live.render_prometheus()
+        assert 'api_client_requests_total{method="POST",endpoint="/user"} 2' in text
+        assert 'api_client_in_flight{method="GET",endpoint="/user/{username}"} 1' in text
+        assert 'api_client_latency_seconds{method="POST",endpoint="/user",quantile="0.99"} 0.05' in text
+
+    @allure.story("Live-метрики")
+    @allure.title("Большие счетчики выводятся без округления")
+    @pytest.mark.performance
+    def test_live_metrics_large_counters(self):
+        """Более миллиона запросов: counter и _count совпадают и точны"""
+        stats = RequestStats()
+        stats.record("POST /user", 0.001)
+        endpoint = stats.endpoints["POST /user"]
+        endpoint.requests, endpoint.errors = 1_234_567, 1_001
+        endpoint.latency.counts = {endpoint.latency.bucket_index(1000): 1_234_567}
+        endpoint.latency.count, endpoint.latency.total = 1_234_567, 1_234_567_000
+
+        live = LiveMetrics()
+        live.ingest(stats)
+        text = live.render_prometheus()
+
+        assert 'api_client_requests_total{method="POST",endpoint="/user"} 1234567\n' in text
+        assert 'api_client_errors_total{method="POST",endpoint="/user"} 1001\n' in text
+        assert 'api_client_latency_seconds_count{method="POST",endpoint="/user"} 1234567\n' in text
+        assert 'api_client_latency_seconds_sum{method="POST",endpoint="/user"} 1234.567\n' in text
+        assert "e+" not in text
@@ -1,20 +1,61 @@
 import pytest
+import requests
 import time
+import json
 import allure
 
 from base.base_test import BaseTest
 from generators.data_generator import UserDataGenerator
 
 
+@pytest.fixture(scope="module", autouse=True)
+def setup_test_environment():
+    """
+    Настройка окружения перед тестами.
+
+    Проверка доступности реального API нужна только тестам этого модуля:
+    остальные тесты работают с локальным стендом или без сети.
+    """
+    with allure.step("Проверка доступности API"):
+        print("\n" + "=" * 50)
+        print("НАСТРОЙКА ОКРУЖЕНИЯ")
+        print("=" * 50)
+
+    try:
+        response = requests.get(
+            "https://petstore.swagger.io/v2/user/login",
+            params={"username": "test", "password": "test"},
+            timeout=5
+        )
+        print(f"✅ API доступен (статус: {response.status_code})")
+        allure.attach(
+            f"API доступен: {response.status_code}",
+            name="Инициализация",
+            attachment_type=allure.attachment_type.TEXT
+        )
+    except Exception as e:
+        error_msg = f"⚠️  API не доступен: {e}"
+        print(error_msg)
+        allure.attach(error_msg, name="Ошибка инициализации", attachment_type=allure.attachment_type.TEXT)
+        pytest.skip("API не доступен")
+
+    yield
+
+    with allure.step("Завершение тестов"):
+        print("\n" + "=" * 50)
+        print("ЗАВЕРШЕНИЕ ТЕСТОВ")
+        print("=" * 50)
+
+
 @allure.feature("Управление пользователями")
 class TestUserAPI:
     """Тестовый класс для API управления пользователями"""
 
     @pytest.fixture(autouse=True)
-    def setup(self):
+    def setup(self, data_seed, payload_corpus):
         """Настройка тестов"""
         self.base = BaseTest()
-        self.generator = UserDataGenerator()
+        self.generator = UserDataGenerator(seed=data_seed, corpus=payload_corpus)
         self.created_users = []
         yield
         self._cleanup_users()
@@ -26,8 +67,11 @@ class TestUserAPI:
             print(f"\n[ОЧИСТКА] Удаление {len(self.created_users)} пользователей...")
             for username in self.created_users:
                 try:
-                    self.base.delete_user(username, allow_failure=True)
-                    print(f"  ✓ Пользователь {username} удален")
+                    response = self.base.delete_user(username, allow_failure=True)
+                    if response.status_code == 200:
+                        print(f"  ✓ Пользователь {username} удален")
+                    else:
+                        print(f"  ✗ Пользователь {username} не удален (статус {response.status_code})")
                 except Exception as e:
                     print(f"  ✗ Ошибка удаления {username}: {e}")
 
@@ -77,6 +121,47 @@ class TestUserAPI:
                 self.created_users.append(user_data["username"])
         print(f"🏁 Тест окончен")
 
+    @allure.story("Создание пользователя")
+    @allure.title("Создание пользователя с невалидными данными из корпуса: {category}")
+    @pytest.mark.regression
+    @pytest.mark.create
+    @pytest.mark.parametrize("category, accepted", [
+        # PetStore не валидирует содержимое строковых полей - пользователь создается
+        ("missing_required", True),
+        ("invalid_email", True),
+        ("boundary_lengths", True),
+        ("unicode", True),
+        # Значения неверных типов API может принять (приведение) или отклонить, но не 5xx
+        ("invalid_status", False),
+        ("wrong_types", False),
+    ])
+    def test_create_user_with_invalid_payload(self, payload_corpus, category, accepted):
+        """Тест создания пользователя с невалидными данными из корпуса payload-ов"""
+        print(f"▶️ Тест создания пользователя с невалидными данными: {category}")
+        with allure.step("Выборка payload из корпуса"):
+            # Только payload-ы, пользователя из которых можно удалить после теста
+            indices = [index for index in payload_corpus.indices(category)
+                       if "/" not in str(payload_corpus.get(index).get("username"))]
+            body = payload_corpus.raw(self.generator.random.choice(indices))
+            payload = json.loads(body)
+            allure.attach(body.decode("utf-8"), name="Payload", attachment_type=allure.attachment_type.JSON)
+
+        with allure.step("Отправка запроса"):
+            response = self.base.create_user(body, allow_failure=True)
+            self.base.log_response(response, f"test_create_user_with_invalid_payload_{category}")
+
+        with allure.step("Сохранение для очистки"):
+            username = payload.get("username")
+            if response.status_code == 200 and isinstance(username, str) and username:
+                self.created_users.append(username)
+
+        with allure.step("Валидация ответа"):
+            assert response.status_code < 500, f"Ошибка сервера на payload {category}: {response.text}"
+            assert response.json()["code"] == response.status_code
+            if accepted:
+                assert response.status_code == 200
+        print(f"🏁 Тест окончен")
+
     @allure.story("Авторизация пользователя")
     @allure.title("Успешный вход в систему")
     @pytest.mark.smoke